@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+    CPU time per page of `fast_get` against suds unmarshalling.
+
+    Builds a suds client for a small CampaignService-like WSDL whose transport
+    answers every request with the same page of entries, so no network is
+    involved. Every page is fetched three ways: plain suds (SAX parse and
+    unmarshal into suds objects), the suds `retxml` option followed by
+    `parse_response` (suds still SAX parses the reply to look for faults), and
+    `fast_get`, which sends the request itself and parses the reply once.
+
+    Usage:
+        python examples/benchmark_fastparse.py [pages] [entries]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import suds.client
+from suds.transport import Reply
+from suds.transport.http import HttpTransport
+
+from adwordspy.fastparse import fast_get
+from adwordspy.fastparse import parse_response
+from adwordspy.fastparse import schema_hints
+
+NS = 'https://adwords.google.com/api/adwords/cm/v201609'
+WSDL = '''<?xml version="1.0" encoding="UTF-8"?>
+<wsdl:definitions xmlns:wsdl="http://schemas.xmlsoap.org/wsdl/" xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:tns="{ns}" targetNamespace="{ns}">
+  <wsdl:types>
+    <xsd:schema targetNamespace="{ns}" elementFormDefault="qualified">
+      <xsd:complexType name="Selector">
+        <xsd:sequence><xsd:element name="fields" type="xsd:string" minOccurs="0" maxOccurs="unbounded"/></xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="Campaign">
+        <xsd:sequence>
+          <xsd:element name="id" type="xsd:long" minOccurs="0"/>
+          <xsd:element name="name" type="xsd:string" minOccurs="0"/>
+          <xsd:element name="status" type="xsd:string" minOccurs="0"/>
+          <xsd:element name="budgetId" type="xsd:long" minOccurs="0"/>
+          <xsd:element name="trialCampaign" type="xsd:boolean" minOccurs="0"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:complexType name="CampaignPage">
+        <xsd:sequence>
+          <xsd:element name="totalNumEntries" type="xsd:int" minOccurs="0"/>
+          <xsd:element name="entries" type="tns:Campaign" minOccurs="0" maxOccurs="unbounded"/>
+        </xsd:sequence>
+      </xsd:complexType>
+      <xsd:element name="get">
+        <xsd:complexType><xsd:sequence><xsd:element name="serviceSelector" type="tns:Selector"/></xsd:sequence></xsd:complexType>
+      </xsd:element>
+      <xsd:element name="getResponse">
+        <xsd:complexType><xsd:sequence><xsd:element name="rval" type="tns:CampaignPage"/></xsd:sequence></xsd:complexType>
+      </xsd:element>
+    </xsd:schema>
+  </wsdl:types>
+  <wsdl:message name="getRequest"><wsdl:part name="parameters" element="tns:get"/></wsdl:message>
+  <wsdl:message name="getResponse"><wsdl:part name="parameters" element="tns:getResponse"/></wsdl:message>
+  <wsdl:portType name="CampaignServiceInterface">
+    <wsdl:operation name="get">
+      <wsdl:input message="tns:getRequest"/>
+      <wsdl:output message="tns:getResponse"/>
+    </wsdl:operation>
+  </wsdl:portType>
+  <wsdl:binding name="CampaignServiceSoapBinding" type="tns:CampaignServiceInterface">
+    <soap:binding style="document" transport="http://schemas.xmlsoap.org/soap/http"/>
+    <wsdl:operation name="get">
+      <soap:operation soapAction=""/>
+      <wsdl:input><soap:body use="literal"/></wsdl:input>
+      <wsdl:output><soap:body use="literal"/></wsdl:output>
+    </wsdl:operation>
+  </wsdl:binding>
+  <wsdl:service name="CampaignService">
+    <wsdl:port name="CampaignServiceInterfacePort" binding="tns:CampaignServiceSoapBinding">
+      <soap:address location="http://localhost/api/adwords/cm/v201609/CampaignService"/>
+    </wsdl:port>
+  </wsdl:service>
+</wsdl:definitions>
+'''.format(ns=NS)
+ENTRY = ('<entries><id>{0}</id><name>Campaign #{0}</name><status>ENABLED</status>'
+         '<budgetId>{0}</budgetId><trialCampaign>false</trialCampaign></entries>')
+
+
+def make_page(entries):
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+            '<getResponse xmlns="{}"><rval><totalNumEntries>{}</totalNumEntries>{}</rval></getResponse>'
+            '</soap:Body></soap:Envelope>').format(
+                NS, entries, ''.join(ENTRY.format(i) for i in range(entries))).encode('utf-8')
+
+
+class PageTransport(HttpTransport):
+    """
+        Loads the WSDL from a file and answers every request with `page`.
+    """
+
+    def __init__(self, page):
+        HttpTransport.__init__(self)
+        self.page = page
+
+    def send(self, request):
+        return Reply(200, {}, self.page)
+
+
+class Service(object):
+    """
+        Minimal stand-in for the googleads service proxy.
+    """
+
+    def __init__(self, suds_client):
+        self.suds_client = suds_client
+
+    def get(self, selector):
+        return self.suds_client.service.get(selector)
+
+
+def retxml_get(service, selector):
+    hints = schema_hints(service.suds_client)
+    service.suds_client.set_options(retxml=True)
+    try:
+        xml = service.get(selector)
+    finally:
+        service.suds_client.set_options(retxml=False)
+    return parse_response(xml, hints)
+
+
+def measure(get, service, pages):
+    selector = {'fields': ['Id', 'Name', 'Status']}
+    started = time.process_time()
+    for _ in range(pages):
+        page = get(service, selector)
+    elapsed = time.process_time() - started
+    assert int(page['totalNumEntries']) == len(page['entries'])
+    return elapsed
+
+
+def main(pages, entries):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'CampaignService.wsdl')
+        with open(path, 'w') as f:
+            f.write(WSDL)
+        url = 'file://' + path
+        suds_client = suds.client.Client(url, cache=None, transport=PageTransport(make_page(entries)))
+        service = Service(suds_client)
+
+        print('{} pages of {} entries'.format(pages, entries))
+        times = []
+        for label, get in (('suds objects', lambda s, selector: s.get(selector)),
+                           ('retxml + parse', retxml_get),
+                           ('fast_get', fast_get)):
+            elapsed = measure(get, service, pages)
+            times.append(elapsed)
+            print('{:16} {:6.2f}s CPU ({:.1f} ms/page)'.format(label + ':', elapsed, elapsed / pages * 1e3))
+        print('fast_get saves   {:.0%} CPU against suds objects, {:.0%} against retxml'.format(
+            1 - times[2] / times[0], 1 - times[2] / times[1]))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
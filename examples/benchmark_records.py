@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+    Memory and conversion cost of compact records against suds objects.
+
+    Builds keyword entities shaped like AdGroupCriterionService results and
+    measures allocated memory per entity and the time `to_record` takes.
+
+    Usage:
+        python examples/benchmark_records.py [count]
+"""
+from __future__ import print_function
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import suds.sudsobject
+
+from adwordspy.records import to_record
+
+
+def make_keyword(i):
+    criterion = suds.sudsobject.Factory.object('Keyword')
+    criterion.id = 1000000 + i
+    setattr(criterion, 'Criterion.Type', 'Keyword')
+    criterion.text = u'keyword {}'.format(i)
+    criterion.matchType = 'EXACT'
+    keyword = suds.sudsobject.Factory.object('BiddableAdGroupCriterion')
+    keyword.adGroupId = 10000 + i // 100
+    keyword.criterionUse = 'BIDDABLE'
+    keyword.criterion = criterion
+    keyword.userStatus = 'ENABLED'
+    return keyword
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.time()
+    result = build()
+    elapsed = time.time() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(count):
+    keywords, suds_size, suds_time = measure(lambda: [make_keyword(i) for i in range(count)])
+    records, record_size, record_time = measure(lambda: [to_record(k) for k in keywords])
+
+    print('{} keywords'.format(count))
+    print('suds objects:    {:8.0f} bytes/entity, built in {:.2f}s'.format(suds_size / count, suds_time))
+    print('records:         {:8.0f} bytes/entity, converted in {:.2f}s ({:.1f} us/entity)'.format(
+        record_size / count, record_time, record_time / count * 1e6))
+    print('memory saved:    {:.0%}'.format(1 - float(record_size) / suds_size))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
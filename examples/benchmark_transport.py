@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+    Latency per page of the pooled keep-alive transport against suds' default one.
+
+    Starts a local HTTPS stand-in for the API (self-signed certificate made with
+    the openssl command) which answers every SOAP request with a page of entries,
+    then sends the same requests through the googleads suds transport, which
+    connects and handshakes for every request, and through `PooledTransport`.
+    `rtt` milliseconds of network round trip are added to every request, and two
+    more to every new connection for the TCP and TLS handshakes.
+
+    Usage:
+        python examples/benchmark_transport.py [pages] [rtt]
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from suds.transport import Request
+
+from googleads import common
+
+from adwordspy.transport import ConnectionPool
+from adwordspy.transport import PooledTransport
+
+ENTRY = b'<entries><id>{}</id><name>Campaign</name><status>ENABLED</status></entries>'
+PAGE = (b'<?xml version="1.0" encoding="UTF-8"?><soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+        b'<soap:Body><getResponse><rval><totalNumEntries>100</totalNumEntries>' +
+        b''.join(ENTRY.replace(b'{}', str(i).encode()) for i in range(100)) +
+        b'</rval></getResponse></soap:Body></soap:Envelope>')
+REQUEST = (b'<?xml version="1.0" encoding="UTF-8"?><soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+           b'<soap:Body><get><serviceSelector><fields>Id</fields></serviceSelector></get></soap:Body></soap:Envelope>')
+HEADERS = {'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': '""'}
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, don't wait for the ack of the headers
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        # TCP and TLS handshakes
+        time.sleep(2 * self.server.rtt)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.rtt)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def make_certificate(directory):
+    certificate = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.check_call([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+        '-addext', 'subjectAltName=DNS:localhost', '-keyout', key, '-out', certificate,
+    ], stderr=subprocess.DEVNULL)
+    return certificate, key
+
+
+def measure(transport, url, pages):
+    started = time.time()
+    for _ in range(pages):
+        request = Request(url, REQUEST)
+        request.headers = dict(HEADERS)
+        transport.send(request)
+    return (time.time() - started) / pages
+
+
+def main(pages, rtt):
+    directory = tempfile.mkdtemp()
+    try:
+        certificate, key = make_certificate(directory)
+        server = Server(('localhost', 0), Handler)
+        server.rtt = rtt / 1000.0
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certificate, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        url = 'https://localhost:{}/api/adwords/cm/v201609/CampaignService'.format(server.server_address[1])
+
+        default = common.ProxyConfig(cafile=certificate).GetSudsProxyTransport()
+        pool = ConnectionPool(context=ssl.create_default_context(cafile=certificate))
+        pooled = PooledTransport(pool)
+        # warm up
+        for transport in (default, pooled):
+            measure(transport, url, 1)
+
+        default_time = measure(default, url, pages)
+        pooled_time = measure(pooled, url, pages)
+        server.shutdown()
+    finally:
+        shutil.rmtree(directory)
+
+    print('{} pages, {} ms round trip'.format(pages, rtt))
+    print('default transport: {:7.2f} ms/page'.format(default_time * 1000))
+    print('pooled transport:  {:7.2f} ms/page ({} connections)'.format(pooled_time * 1000, pool.created))
+    print('saved:             {:7.2f} ms/page'.format((default_time - pooled_time) * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, float(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -66,8 +66,11 @@ setup(
     ],
     install_requires=[
         'googleads==4.8.0',
+        'pytz',
+        'futures; python_version < "3"',
     ],
     extras_require={
+        'numpy': ['numpy'],
     },
     entry_points={
         'console_scripts': [
@@ -1,144 +1,701 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import collections
+import copy
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import threading
 import time
+from concurrent import futures
 
 import suds
+import suds.client
+import suds.options
+from suds.properties import Unskin
 
 from googleads import adwords
+from googleads import common
 from googleads import oauth2
-
-
-class RetriesLimitException(Exception):
-    def __init__(self, retries):
-        Exception.__init__(self, 'Tried to get service {} times, but failed.'.format(retries))
+from googleads.errors import AdWordsReportBadRequestError
+
+from adwordspy.cache import ServiceCache
+from adwordspy.columnar import load_columns
+from adwordspy.fastparse import fast_get
+from adwordspy.oauth import CachedRefreshTokenClient
+from adwordspy.records import to_record
+from adwordspy.reports import ReportResult
+from adwordspy.reports import concat_reports
+from adwordspy.reports import date_shards
+from adwordspy.reports import iter_csv_rows
+from adwordspy.reports import merge_reports
+from adwordspy.reports import parse_awql_during
+from adwordspy.reports import parse_awql_fields
+from adwordspy.reports import record_type
+from adwordspy.reports import with_awql_during
+from adwordspy.results import MutateResult
+from adwordspy.results import MutateResults
+from adwordspy.results import OperationError
+from adwordspy.retry import RETRY
+from adwordspy.retry import RetriesLimitException
+from adwordspy.retry import RetryPolicy
+from adwordspy.retry import fault_errors
+from adwordspy.transport import ConnectionPool
+from adwordspy.transport import PooledOpener
+from adwordspy.transport import PooledTransport
+from adwordspy.utils import atomic_file
+from adwordspy.writebehind import MutationQueue
+
+FIELD_PATH_INDEX = re.compile(r'^operations\[(\d+)\]')
+
+
+def _clone_suds_client(suds_client, transport):
+    """
+        suds client sharing the parsed WSDL and type factory of `suds_client`, with its own
+        options, headers and `transport` (suds' clone deep copies transports, which fails).
+    """
+    clone = copy.copy(suds_client)
+    options = Unskin(suds_client.options)
+    clone.options = suds.options.Options()
+    # transport first, some options (headers, timeout, ...) are stored on it
+    clone.set_options(transport=transport)
+    clone.set_options(**dict((name, options.get(name)) for name in options.keys() if name != 'transport'))
+    clone.service = suds.client.ServiceSelector(clone, suds_client.wsdl.services)
+    clone.messages = dict(tx=None, rx=None)
+    return clone
 
 
 class AdwordsAPI(object):
     def __init__(self, account_id, client_id, client_secret, refresh_token, developer_token,
-                 version='v201609', page_size=100, retries=3, timesleep=True):
+                 version='v201609', page_size=100, retries=3, timesleep=True, service_cache=None,
+                 page_workers=1, prefetch=None, mutate_size=5000, mutate_workers=1,
+                 write_behind=False, flush_interval=None, retry_policy=None, rate_limiter=None,
+                 report_cache=None, entity_cache=None, records=False, fast_parse=False,
+                 oauth2_client=None, token_cache=None, thread_safe=False, connection_pool=None,
+                 id_chunk_size=1000, chunk_workers=1, ordered_chunks=True):
         self.account_id = account_id
         self.client_id = client_id
         self.client_secret = client_secret
         self.refresh_token = refresh_token
         self.developer_token = developer_token
-        self.client = self._make_client()
-        self._service_cache = {}
         self.version = version
+        # the adwords client (and OAuth client, unless a shared one is given) is built on first use
+        self._oauth2_client = oauth2_client
+        # access tokens are shared through token_cache by all clients using it
+        self.token_cache = token_cache
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._partial_failure_client = None
+        self._service_cache = {}
+        # services are clones of one loaded definition per service name
+        self._definitions = {}
+        # instances made by for_customer clone the services of the instance they were made from
+        self._template = None
+        # get_service returns services owned by the calling thread
+        self.thread_safe = thread_safe
+        # services and report downloads keep their connections open in connection_pool, shared by all its users
+        if connection_pool is True:
+            connection_pool = ConnectionPool()
+        self.connection_pool = connection_pool or None
         self.page_size = page_size
         self.retries = retries
         self.timesleep = timesleep
+        # reads and mutations share one policy, retries and timesleep configure the default one
+        if retry_policy is None:
+            retry_policy = RetryPolicy(retries=retries, sleep=timesleep)
+        self.retry_policy = retry_policy
+        # every request takes a token, shared limiters pause all their users on RateExceededError
+        self.rate_limiter = rate_limiter
+        if service_cache is not None and not isinstance(service_cache, ServiceCache):
+            service_cache = ServiceCache(service_cache)
+        self.service_cache = service_cache
+        self._service_lock = threading.Lock()
+        self._report_downloader = None
+        self.report_cache = report_cache
+        # paged get_* results are served from entity_cache until their TTL expires
+        self.entity_cache = entity_cache
+        # paged entries are converted to compact __slots__ records instead of suds objects
+        self.records = records
+        # get responses are parsed straight into dicts, suds still handles requests and faults
+        self.fast_parse = fast_parse
+        self._local = threading.local()
+        # pages after the first one are fetched concurrently when page_workers > 1
+        self.page_workers = page_workers
+        self.prefetch = prefetch or 2 * page_workers
+        # id lists of get_adgroups, get_ads and get_keywords are queried id_chunk_size ids at a time,
+        # concurrently when chunk_workers > 1, yielding entries in chunk order only if ordered_chunks is set
+        self.id_chunk_size = id_chunk_size
+        self.chunk_workers = chunk_workers
+        self.ordered_chunks = ordered_chunks
+        # bulk mutations send at most mutate_size operations per request
+        self.mutate_size = mutate_size
+        self.mutate_workers = mutate_workers
+        # set_*_status calls are queued and coalesced when write_behind is enabled
+        self.mutation_queue = None
+        if write_behind:
+            self.mutation_queue = MutationQueue(self, max_size=mutate_size, interval=flush_interval)
+
+    @property
+    def oauth2_client(self):
+        """
+            OAuth client, pass one `oauth2_client` to many instances to share credentials.
+        """
+        if self._oauth2_client is None:
+            if self.token_cache is not None:
+                self._oauth2_client = CachedRefreshTokenClient(
+                    self.client_id,
+                    self.client_secret,
+                    self.refresh_token,
+                    cache=self.token_cache)
+            else:
+                self._oauth2_client = oauth2.GoogleRefreshTokenClient(
+                    self.client_id,
+                    self.client_secret,
+                    self.refresh_token)
+        return self._oauth2_client
+
+    @property
+    def client(self):
+        """
+            Adwords client, made on first use.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._make_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        self._partial_failure_client = None
 
     def _make_client(self):
         """
             Make a custom adwords client.
         """
-        oauth2_client = oauth2.GoogleRefreshTokenClient(
-            self.client_id,
-            self.client_secret,
-            self.refresh_token)
-
         adwords_client = adwords.AdWordsClient(
             self.developer_token,
-            oauth2_client,
+            self.oauth2_client,
             'adwords-client',
             client_customer_id=self.account_id)
 
         return adwords_client
 
+    def _cache_bucket(self, name):
+        if self.service_cache is None:
+            return None
+        return self.service_cache.bucket(self.version, name)
+
+    def _get_client(self, partial_failure=False):
+        if not partial_failure:
+            return self.client
+        if self._partial_failure_client is None:
+            # googleads sends the partialFailure header of the client which built the service,
+            # a copy shares OAuth credentials with the main client
+            client = copy.copy(self.client)
+            client.partial_failure = True
+            with self._client_lock:
+                if self._partial_failure_client is None:
+                    self._partial_failure_client = client
+        return self._partial_failure_client
+
+    def _definition(self, name):
+        """
+            Service `name` used only as the source of its parsed definition, loaded once.
+        """
+        client = self.client
+        with self._service_lock:
+            service = self._definitions.get(name)
+            if service is None:
+                service = self._load_service(client, name)
+                self._definitions[name] = service
+        return service
+
+    def _load_service(self, client, name):
+        """
+            Build service `name` like googleads' GetService, caching its built definition.
+
+            suds' default caching policy only caches the downloaded documents and rebuilds the
+            schema from them every time. With cachingpolicy=1 the whole built definition is
+            pickled into `service_cache`.
+        """
+        bucket = self._cache_bucket(name)
+        service_map = adwords._SERVICE_MAP.get(self.version, {})
+        if bucket is None or name not in service_map:
+            # unknown services and versions get googleads' errors
+            client.cache = bucket
+            return client.GetService(name, version=self.version)
+
+        url = client._SOAP_SERVICE_FORMAT % (adwords._DEFAULT_ENDPOINT, service_map[name], self.version, name)
+        suds_client = suds.client.Client(url, cache=bucket, cachingpolicy=1, timeout=3600,
+                                         transport=client.proxy_config.GetSudsProxyTransport(),
+                                         plugins=[client.message_plugin])
+        return common.SudsServiceProxy(suds_client, adwords._AdWordsHeaderHandler(client, self.version))
+
+    def _build_service(self, name, partial_failure=False):
+        """
+            Create service `name`, its definition is loaded (from `service_cache` if possible) only once.
+        """
+        template = self._template or self
+        return template._clone_service(name, self._get_client(partial_failure))
+
+    def _clone_service(self, name, client):
+        """
+            Copy of service `name` sending the headers of `client`, sharing the parsed definition.
+        """
+        service = self._definition(name)
+        if self.connection_pool is None:
+            transport = client.proxy_config.GetSudsProxyTransport()
+        else:
+            transport = PooledTransport(self.connection_pool)
+        suds_client = _clone_suds_client(service.suds_client, transport)
+        return common.SudsServiceProxy(suds_client, adwords._AdWordsHeaderHandler(client, self.version))
+
+    def for_customer(self, customer_id):
+        """
+            Client for account `customer_id` reusing this instance's OAuth client and services.
+
+            Nothing is downloaded or parsed again, services of the new instance are
+            clones of already loaded ones with their own customer id headers, so
+            instances for different customers can be used in parallel.
+
+            Examples:
+                >>> manager = AdwordsAPI(manager_id, ...)
+                >>> for account in manager.get_accounts():
+                ...     campaigns = list(manager.for_customer(account.customerId).get_campaigns())
+        """
+        template = self._template or self
+        api = copy.copy(template)
+        api.account_id = customer_id
+        client = copy.copy(template.client)
+        client.client_customer_id = customer_id
+        api._client = client
+        api._client_lock = threading.Lock()
+        api._partial_failure_client = None
+        api._service_cache = {}
+        api._definitions = {}
+        api._service_lock = threading.Lock()
+        api._report_downloader = None
+        api._local = threading.local()
+        api._template = template
+        # every account queues its own mutations
+        if template.mutation_queue is not None:
+            queue = template.mutation_queue
+            api.mutation_queue = MutationQueue(api, max_size=queue.max_size, interval=queue.interval,
+                                               partial_failure=queue.partial_failure, on_flush=queue.on_flush)
+        return api
+
     def _refresh_service(self, name):
         """
             If we get AuthenticationError try to refresh service.
         """
-        service = self.client.GetService(name, version=self.version)
+        if self.thread_safe:
+            return self._refresh_thread_service(name)
+        service = self._build_service(name)
         self._service_cache[name] = service
         return service
 
-    def get_service(self, name):
+    def get_service(self, name, partial_failure=False):
         """
+            Get service `name`, it is created only on first use.
+
+            suds services can't be used by several threads at once. In `thread_safe`
+            mode every thread gets its own services, cloned from definitions loaded once.
         """
-        if name in self._service_cache:
-            service = self._service_cache[name]
+        if self.thread_safe:
+            return self._thread_service(name, partial_failure)
+        key = (name, True) if partial_failure else name
+        if key in self._service_cache:
+            service = self._service_cache[key]
         else:
-            service = self.client.GetService(name, version=self.version)
-            self._service_cache[name] = service
+            service = self._build_service(name, partial_failure)
+            self._service_cache[key] = service
         return service
 
+    def invalidate_service_cache(self, name=None):
+        """
+            Drop cached service definitions, both in memory and on disk.
+
+            Args:
+                name (str): service name, all services if None
+        """
+        with self._service_lock:
+            if name is None:
+                self._service_cache.clear()
+                self._definitions.clear()
+                self._report_downloader = None
+            else:
+                self._service_cache.pop(name, None)
+                self._service_cache.pop((name, True), None)
+                self._definitions.pop(name, None)
+            # services of other threads can't be reached, they all start over
+            self._local = threading.local()
+        if self.service_cache is not None:
+            self.service_cache.invalidate(name, version=self.version)
+
+    def get_report_downloader(self):
+        """
+            Get report downloader, it is created only on first use.
+        """
+        if self._report_downloader is None:
+            with self._service_lock:
+                self.client.cache = self._cache_bucket('ReportDownloader')
+                report_downloader = self.client.GetReportDownloader(version=self.version)
+                if self.connection_pool is not None:
+                    report_downloader.url_opener = PooledOpener(self.connection_pool)
+                self._report_downloader = report_downloader
+        return self._report_downloader
+
+    def _limited(self, fn):
+        """
+            Wrap `fn(service)` so it passes through `rate_limiter`.
+        """
+        if self.rate_limiter is None:
+            return fn
+
+        def call(service):
+            self.rate_limiter.acquire()
+            try:
+                return fn(service)
+            except suds.WebFault as e:
+                retry_after = [int(error['retryAfterSeconds']) for error in fault_errors(e)
+                               if error['ApiError.Type'] == 'RateExceededError' and 'retryAfterSeconds' in error]
+                if retry_after:
+                    self.rate_limiter.pause(max(retry_after))
+                raise
+        return call
+
     def _mutate_operation(self, service, operations):
+        return self.retry_policy.call(self._limited(lambda s: s.mutate(operations)), service)
 
+    def _mutate_chunk(self, service, operations, partial_failure=False):
+        """
+            Send `operations` in one mutate call and return a MutateResult for each of them.
+        """
+        if partial_failure:
+            return self._mutate_partial(service, operations)
+
+        try:
+            result = self._mutate_operation(service, operations)
+        except Exception as e:
+            # faults and transport errors fail only this chunk, the outcomes of the others are kept
+            return [MutateResult(operation, None, e) for operation in operations]
+
+        values = self._result_values(result, len(operations))
+        return [MutateResult(operation, value, None) for operation, value in zip(operations, values)]
+
+    @staticmethod
+    def _result_values(result, size):
+        values = result['value'] if result is not None and 'value' in result else []
+        if not isinstance(values, list):
+            values = [values]
+        return values + [None] * (size - len(values))
+
+    def _mutate_partial(self, service, operations):
+        """
+            Mutate with the partialFailure header, so valid operations are applied even if others fail.
+
+            Operations which failed only with retryable errors are sent again (without the
+            successful ones), at most `retries` times.
+        """
+        results = [None] * len(operations)
+        pending = list(range(len(operations)))
+        started = time.time()
         tries = 0
-        while tries <= self.retries:
+
+        while pending:
             try:
-                service.mutate(operations)
+                result = self._mutate_operation(service, [operations[i] for i in pending])
+            except Exception as e:
+                for i in pending:
+                    results[i] = MutateResult(operations[i], None, e)
                 break
-            except suds.WebFault as e:
-                errors = e.fault.detail.ApiExceptionFault.errors
-                if not isinstance(errors, list):
-                    errors = [errors]
-                for error in errors:
-                    if error['ApiError.Type'] == 'InternalApiError':
-                        tries += 1
-                        if self.timesleep:
-                            time.sleep(2 ** tries)
-                    elif error['ApiError.Type'] == 'RateExceededError':
-                        if self.timesleep:
-                            time.sleep(int(error['retryAfterSeconds']))
-                    else:
-                        raise e
-
-        if tries > self.retries:
-            raise RetriesLimitException(self.retries)
-
-    def _iter_selector(self, service, selector, name):
+
+            errors = self._partial_failure_errors(result)
+            values = self._result_values(result, len(pending))
+            retry = collections.OrderedDict()
+            for position, i in enumerate(pending):
+                operation_errors = errors.get(position)
+                if not operation_errors:
+                    results[i] = MutateResult(operations[i], values[position], None)
+                elif tries < self.retry_policy.retries and self.retry_policy.action(operation_errors) == RETRY:
+                    retry[i] = operation_errors
+                else:
+                    results[i] = MutateResult(operations[i], None, OperationError(operation_errors))
+
+            tries += 1
+            if retry:
+                try:
+                    self.retry_policy.wait(tries, list(itertools.chain.from_iterable(retry.values())), started)
+                except RetriesLimitException:
+                    for i, operation_errors in retry.items():
+                        results[i] = MutateResult(operations[i], None, OperationError(operation_errors))
+                    break
+            pending = list(retry)
+
+        return results
+
+    @staticmethod
+    def _partial_failure_errors(result):
         """
-            Yield a list of entries from `service` using `selector`
+            Group partialFailureErrors of mutate `result` by operation index.
+        """
+        errors = {}
+        if result is None or 'partialFailureErrors' not in result:
+            return errors
+        for error in result['partialFailureErrors'] or []:
+            match = FIELD_PATH_INDEX.match(error['fieldPath'] or '')
+            if match:
+                errors.setdefault(int(match.group(1)), []).append(error)
+        return errors
+
+    def _mutate_bulk(self, name, operations, partial_failure=False, thread_service=False):
+        """
+            Send `operations` to service `name` in chunks of `mutate_size`.
+
+            Chunks are sent by `mutate_workers` threads, a failed chunk doesn't stop the others.
+            With `thread_service` a single worker uses services of the calling thread too,
+            for callers running outside the thread using this instance.
         """
-        offset = 0
-        more_pages = True
+        operations = list(operations)
+        chunks = [operations[i:i + self.mutate_size] for i in range(0, len(operations), self.mutate_size)]
 
-        while more_pages:
-            tries = 0
-            while tries <= self.retries:
+        try:
+            if self.mutate_workers > 1 and len(chunks) > 1:
+                def mutate(chunk):
+                    return self._mutate_chunk(self._thread_service(name, partial_failure), chunk, partial_failure)
+
+                executor = futures.ThreadPoolExecutor(max_workers=self.mutate_workers)
                 try:
-                    page = service.get(selector)
-                    break
-                except suds.WebFault as e:
-                    errors = e.fault.detail.ApiExceptionFault.errors
-                    if not isinstance(errors, list):
-                        errors = [errors]
-                    for error in errors:
-                        if error['ApiError.Type'] == 'AuthenticationError':
-                            self._refresh_service(name)
-                            # this will try to get service one more time
-                            tries += self.retries - 1
-                        elif error['ApiError.Type'] == 'InternalApiError':
-                            tries += 1
-                            if self.timesleep:
-                                time.sleep(2 ** tries)
-                        elif error['ApiError.Type'] == 'RateExceededError':
-                            if self.timesleep:
-                                time.sleep(int(error['retryAfterSeconds']))
-                        else:
-                            raise e
-            if tries > self.retries:
-                raise RetriesLimitException(self.retries)
+                    results = list(executor.map(mutate, chunks))
+                finally:
+                    executor.shutdown()
+            else:
+                if thread_service:
+                    service = self._thread_service(name, partial_failure)
+                else:
+                    service = self.get_service(name, partial_failure)
+                results = [self._mutate_chunk(service, chunk, partial_failure) for chunk in chunks]
+        finally:
+            self._invalidate_entities(name)
+
+        return MutateResults(itertools.chain.from_iterable(results))
+
+    def _get_page(self, service, selector, name, refresh=None):
+        """
+            Get a single page from `service` using `selector`
+        """
+        if refresh is None:
+            refresh = self._refresh_service
+        if self.fast_parse:
+            get = self._limited(lambda s: fast_get(s, selector))
+        else:
+            get = self._limited(lambda s: s.get(selector))
+        return self.retry_policy.call(get, service, lambda: refresh(name))
 
-            if 'entries' in page:
-                for c in page['entries']:
-                    yield c
+    def _thread_service(self, name, partial_failure=False):
+        """
+            Get service `name` owned by the current thread, suds services can't be shared.
+        """
+        services = self._local.__dict__.setdefault('services', {})
+        key = (name, True) if partial_failure else name
+        if key not in services:
+            services[key] = self._build_service(name, partial_failure)
+        return services[key]
+
+    def _refresh_thread_service(self, name):
+        service = self._build_service(name)
+        self._local.__dict__.setdefault('services', {})[name] = service
+        return service
 
-            offset += self.page_size
+    def _fetch_page(self, selector, name, offset):
+        selector = copy.deepcopy(selector)
+        selector['paging'] = {'startIndex': str(offset), 'numberResults': str(self.page_size)}
+        return self._get_page(self._thread_service(name), selector, name,
+                              refresh=self._refresh_thread_service)
+
+    def _prefetch_pages(self, selector, name, offsets):
+        """
+            Yield pages at `offsets` in order, fetching them with `page_workers` threads.
+
+            At most `prefetch` pages are in flight or waiting to be consumed, so a slow
+            consumer stops the workers instead of buffering the whole result.
+        """
+        offsets = iter(offsets)
+        pending = collections.deque()
+        executor = futures.ThreadPoolExecutor(max_workers=self.page_workers)
+        try:
+            for offset in itertools.islice(offsets, self.prefetch):
+                pending.append(executor.submit(self._fetch_page, selector, name, offset))
+            while pending:
+                page = pending.popleft().result()
+                for offset in itertools.islice(offsets, 1):
+                    pending.append(executor.submit(self._fetch_page, selector, name, offset))
+                yield page
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _total_entries(page):
+        # an empty result may come without totalNumEntries
+        return int(page['totalNumEntries']) if 'totalNumEntries' in page else 0
+
+    def _iter_pages(self, service, selector, name, refresh=None):
+        """
+            Yield pages from `service` using `selector`
+        """
+        page = self._get_page(service, selector, name, refresh)
+        yield page
+
+        offset = self.page_size
+        total = self._total_entries(page)
+        if self.page_workers > 1 and offset < total:
+            for page in self._prefetch_pages(selector, name, range(offset, total, self.page_size)):
+                yield page
+            return
+
+        while offset < total:
             selector['paging']['startIndex'] = str(offset)
-            more_pages = offset < int(page['totalNumEntries'])
+            page = self._get_page(service, selector, name, refresh)
+            yield page
+            offset += self.page_size
+            total = self._total_entries(page)
+
+    def _iter_selector(self, service, selector, name, refresh=None):
+        """
+            Yield a list of entries from `service` using `selector`
+        """
+        for page in self._iter_pages(service, selector, name, refresh):
+            if 'entries' in page:
+                if self.records:
+                    for c in page['entries']:
+                        yield to_record(c)
+                else:
+                    for c in page['entries']:
+                        yield c
+
+    def _cached_entries(self, name, selector):
+        """
+            Yield entries of `selector` from the entity cache, or from the API filling the cache
+        """
+        key = self.entity_cache.key(name, selector, self.account_id)
+        entries = self.entity_cache.get(key)
+        if entries is not None:
+            for entry in entries:
+                yield entry
+            return
+
+        entries = []
+        for entry in self.get_custom_service(name, selector, cache=False):
+            entries.append(entry)
+            yield entry
+        # only complete results are cached
+        self.entity_cache.put(key, entries)
+
+    def _invalidate_entities(self, name):
+        if self.entity_cache is not None:
+            self.entity_cache.invalidate(name, self.account_id)
+
+    def _fetch_chunk(self, name, selector):
+        """
+            All entries of `selector`, fetched with services of the calling thread.
+        """
+        if self.entity_cache is not None:
+            key = self.entity_cache.key(name, selector, self.account_id)
+            entries = self.entity_cache.get(key)
+            if entries is not None:
+                return entries
+
+        selector['paging'] = {'startIndex': 0, 'numberResults': str(self.page_size)}
+        entries = list(self._iter_selector(self._thread_service(name), selector, name,
+                                           refresh=self._refresh_thread_service))
+        if self.entity_cache is not None:
+            self.entity_cache.put(key, entries)
+        return entries
+
+    def _get_chunked(self, name, selector, ids):
+        """
+            Yield entries of `selector` with the values of its first predicate, `ids`, split into chunks.
+
+            Duplicate ids are dropped before chunking. Every entity belongs to one parent
+            id, so no entity is returned by two chunks. With a single chunk worker chunks
+            are fetched one after another and entries are yielded page by page. With
+            `chunk_workers` > 1 chunks are fetched by that many threads and every chunk is
+            collected in memory, at most twice as many chunks as workers are in flight or
+            waiting to be consumed. With `ordered_chunks` entries are yielded in chunk
+            order, otherwise a chunk is yielded as soon as it's fetched.
+        """
+        selectors = self._chunk_selectors(selector, ids)
+        if selectors is None:
+            return self.get_custom_service(name, selector)
+        if self.chunk_workers <= 1:
+            return itertools.chain.from_iterable(self.get_custom_service(name, s) for s in selectors)
+        return self._merge_chunks(name, selectors)
+
+    def _chunk_selectors(self, selector, ids):
+        """
+            Copies of `selector` with at most `id_chunk_size` of `ids` each, None if `ids` fit in one request.
+        """
+        if not isinstance(ids, (list, tuple, set, frozenset)):
+            return None
+        ids = list(collections.OrderedDict.fromkeys(ids))
+        selector['predicates'][0]['values'] = ids
+        if len(ids) <= self.id_chunk_size:
+            return None
+
+        selectors = []
+        for i in range(0, len(ids), self.id_chunk_size):
+            chunk_selector = copy.deepcopy(selector)
+            chunk_selector['predicates'][0]['values'] = ids[i:i + self.id_chunk_size]
+            selectors.append(chunk_selector)
+        return selectors
+
+    def _merge_chunks(self, name, selectors):
+        """
+            Yield entries of chunk `selectors`, fetched by `chunk_workers` threads.
+        """
+        selectors = iter(selectors)
+        pending = []
+        executor = futures.ThreadPoolExecutor(max_workers=self.chunk_workers)
+        try:
+            for selector in itertools.islice(selectors, 2 * self.chunk_workers):
+                pending.append(executor.submit(self._fetch_chunk, name, selector))
+            while pending:
+                if self.ordered_chunks:
+                    future = pending.pop(0)
+                else:
+                    done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    future = next(f for f in pending if f in done)
+                    pending.remove(future)
+                entries = future.result()
+                for selector in itertools.islice(selectors, 1):
+                    pending.append(executor.submit(self._fetch_chunk, name, selector))
+                for entry in entries:
+                    yield entry
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def get_custom_service(self, name, selector, pagination=True, cache=True):
+        if pagination and cache and self.entity_cache is not None:
+            for entry in self._cached_entries(name, selector):
+                yield entry
+            return
 
-    def get_custom_service(self, name, selector, pagination=True):
         service = self.get_service(name)
         if pagination:
             selector['paging'] = {'startIndex': 0, 'numberResults': str(self.page_size)}
             for page in self._iter_selector(service, selector, name):
                 yield page
         else:
-            yield service.get(selector)
+            yield self._get_page(service, selector, name)
 
     def get_accounts(self, fields=None, filters=None, manage_clients=False):
         """
@@ -256,7 +813,7 @@ class AdwordsAPI(object):
         """
             Get all adgroups from `campaign_ids`
             Args:
-                campaign_ids (list): list of campaign ids
+                campaign_ids (list): list of campaign ids, queried `id_chunk_size` ids at a time
                 fields (list): list of fields you want to get for each adgroup
                                https://developers.google.com/adwords/api/docs/reference/v201609/AdGroupService.AdGroup
                 filters (list): list of filters you want to filter by
@@ -301,7 +858,7 @@ class AdwordsAPI(object):
                 pre_filters.append(f)
         selector['predicates'] = pre_filters
 
-        return self.get_custom_service(name, selector)
+        return self._get_chunked(name, selector, campaign_ids)
 
     def get_adgroups_by_status(self, campaign_ids, fields=None, statuses=None):
         """
@@ -330,13 +887,15 @@ class AdwordsAPI(object):
 
         return self.get_adgroups(campaign_ids, fields=fields, filters=filters)
 
-    def get_ads(self, adgroup_ids, types=None, filters=None):
+    def get_ads(self, adgroup_ids, types=None, filters=None, fields=None):
         """
             Get all ads from `adgroup_ids`
             Args:
-                adgroup_ids (list): list of adgroup ids
+                adgroup_ids (list): list of adgroup ids, queried `id_chunk_size` ids at a time
                 filters (list): list of filters you want to filter by
                                 https://developers.google.com/adwords/api/docs/reference/v201609/AdGroupAdService.Predicate
+                fields (list): list of fields you want to get for each ad, only Id by default
+                               https://developers.google.com/adwords/api/docs/reference/v201609/AdGroupAdService.AdGroupAd
 
             Yields:
                 ads
@@ -353,7 +912,8 @@ class AdwordsAPI(object):
         """
         name = 'AdGroupAdService'
 
-        fields = ['Id']
+        if fields is None:
+            fields = ['Id']
 
         selector = {'fields': fields}
 
@@ -379,7 +939,7 @@ class AdwordsAPI(object):
                 pre_filters.append(f)
         selector['predicates'] = pre_filters
 
-        return self.get_custom_service(name, selector)
+        return self._get_chunked(name, selector, adgroup_ids)
 
     def get_text_ads(self, adgroup_ids, filters=None):
         """
@@ -420,13 +980,15 @@ class AdwordsAPI(object):
 
         return self.get_text_ads(adgroup_ids, filters=filters)
 
-    def get_keywords(self, adgroup_ids, filters=None):
+    def get_keywords(self, adgroup_ids, filters=None, fields=None):
         """
             Get all keywords from `adgroup_ids`
             Args:
-                adgroup_ids (list): list of adgroup ids
+                adgroup_ids (list): list of adgroup ids, queried `id_chunk_size` ids at a time
                 filters (list): list of filters you want to filter by
                                 https://developers.google.com/adwords/api/docs/reference/v201609/AdGroupCriterionService.Keyword
+                fields (list): list of fields you want to get for each keyword, only Id by default
+                               https://developers.google.com/adwords/api/docs/reference/v201609/AdGroupCriterionService.Keyword
 
             Yields:
                 keywords
@@ -444,7 +1006,8 @@ class AdwordsAPI(object):
 
         name = 'AdGroupCriterionService'
 
-        fields = ['Id']
+        if fields is None:
+            fields = ['Id']
 
         selector = {'fields': fields}
 
@@ -471,7 +1034,7 @@ class AdwordsAPI(object):
                 pre_filters.append(f)
         selector['predicates'] = pre_filters
 
-        return self.get_custom_service(name, selector)
+        return self._get_chunked(name, selector, adgroup_ids)
 
     def get_keywords_by_match_type(self, adgroup_ids, match_types=None):
         """
@@ -527,61 +1090,158 @@ class AdwordsAPI(object):
 
         return self.get_keywords(adgroup_ids, filters=filters)
 
-    def set_adgroup_status(self, adgroup_id, status):
+    @staticmethod
+    def _adgroup_status_operation(adgroup_id, status):
+        return {
+            'operator': 'SET',
+            'operand': {
+                'id': adgroup_id,
+                'status': status,
+            }
+        }
 
-        name = 'AdGroupService'
-        service = self.get_service(name)
+    @staticmethod
+    def _ad_status_operation(ad_group_id, ad_id, status):
+        return {
+            'operator': 'SET',
+            'operand': {
+                'adGroupId': ad_group_id,
+                'status': status,
+                'ad': {
+                    'id': ad_id
+                }
+            }
+        }
 
-        operations = [
-            {
-                'operator': 'SET',
-                'operand': {
-                    'id': adgroup_id,
-                    'status': status,
+    @staticmethod
+    def _keyword_status_operation(adgroup_id, keyword_id, status):
+        return {
+            'operator': 'SET',
+            'operand': {
+                'xsi_type': 'BiddableAdGroupCriterion',
+                'adGroupId': adgroup_id,
+                'userStatus': status,
+                'criterion': {
+                    'xsi_type': 'Keyword',
+                    'id': keyword_id,
                 }
             }
-        ]
-        self._mutate_operation(service, operations)
+        }
+
+    def set_adgroup_status(self, adgroup_id, status):
+
+        name = 'AdGroupService'
+        operation = self._adgroup_status_operation(adgroup_id, status)
+        if self.mutation_queue is not None:
+            self.mutation_queue.put(name, adgroup_id, operation)
+            return
+
+        service = self.get_service(name)
+        self._mutate_operation(service, [operation])
+        self._invalidate_entities(name)
 
     def set_ad_status(self, ad_group_id, ad_id, status):
 
         name = 'AdGroupAdService'
-        service = self.get_service(name)
+        operation = self._ad_status_operation(ad_group_id, ad_id, status)
+        if self.mutation_queue is not None:
+            self.mutation_queue.put(name, (ad_group_id, ad_id), operation)
+            return
 
-        operations = [
-            {
-                'operator': 'SET',
-                'operand': {
-                    'adGroupId': ad_group_id,
-                    'status': status,
-                    'ad': {
-                        'id': ad_id
-                    }
-                }
-            }
-        ]
-        self._mutate_operation(service, operations)
+        service = self.get_service(name)
+        self._mutate_operation(service, [operation])
+        self._invalidate_entities(name)
 
     def set_keyword_status(self, adgroup_id, keyword_id, status):
 
         name = 'AdGroupCriterionService'
+        operation = self._keyword_status_operation(adgroup_id, keyword_id, status)
+        if self.mutation_queue is not None:
+            self.mutation_queue.put(name, (adgroup_id, keyword_id), operation)
+            return
+
         criterion_service = self.get_service(name)
+        self._mutate_operation(criterion_service, [operation])
+        self._invalidate_entities(name)
 
-        operations = [
-            {
-                'operator': 'SET',
-                'operand': {
-                    'xsi_type': 'BiddableAdGroupCriterion',
-                    'adGroupId': adgroup_id,
-                    'userStatus': status,
-                    'criterion': {
-                        'xsi_type': 'Keyword',
-                        'id': keyword_id,
-                    }
-                }
-            }
-        ]
-        self._mutate_operation(criterion_service, operations)
+    def flush(self):
+        """
+            Send status changes queued by write behind mode
+
+            Returns:
+                MutateResults of the sent operations
+        """
+        if self.mutation_queue is None:
+            return MutateResults()
+        return self.mutation_queue.flush()
+
+    def close(self):
+        """
+            Send status changes queued by write behind mode and stop the flush timer
+
+            The timer thread doesn't keep the process alive, call `close()` (or use the
+            instance as a context manager) before exiting so queued changes are sent.
+
+            Returns:
+                MutateResults of the sent operations
+
+            Examples:
+                >>> with AdwordsAPI(account_id, ..., write_behind=True, flush_interval=5) as adwords:
+                ...     adwords.set_adgroup_status(1234, 'PAUSED')
+        """
+        if self.mutation_queue is None:
+            return MutateResults()
+        return self.mutation_queue.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def set_adgroup_statuses(self, statuses, partial_failure=False):
+        """
+            Set status of many adgroups with as few requests as possible
+            Args:
+                statuses (iterable): (adgroup_id, status) pairs
+                partial_failure (bool): apply valid operations even if others in the same request fail
+
+            Returns:
+                MutateResults, one MutateResult for each pair in the same order
+
+            Examples:
+                >>> results = set_adgroup_statuses([(1, 'PAUSED'), (2, 'ENABLED')])
+                >>> results.failures
+                >>> results = set_adgroup_statuses(pairs, partial_failure=True)
+        """
+        operations = (self._adgroup_status_operation(*item) for item in statuses)
+        return self._mutate_bulk('AdGroupService', operations, partial_failure)
+
+    def set_ad_statuses(self, statuses, partial_failure=False):
+        """
+            Set status of many ads with as few requests as possible
+            Args:
+                statuses (iterable): (ad_group_id, ad_id, status) triples
+                partial_failure (bool): apply valid operations even if others in the same request fail
+
+            Returns:
+                MutateResults, one MutateResult for each triple in the same order
+        """
+        operations = (self._ad_status_operation(*item) for item in statuses)
+        return self._mutate_bulk('AdGroupAdService', operations, partial_failure)
+
+    def set_keyword_statuses(self, statuses, partial_failure=False):
+        """
+            Set status of many keywords with as few requests as possible
+            Args:
+                statuses (iterable): (adgroup_id, keyword_id, status) triples
+                partial_failure (bool): apply valid operations even if others in the same request fail
+
+            Returns:
+                MutateResults, one MutateResult for each triple in the same order
+        """
+        operations = (self._keyword_status_operation(*item) for item in statuses)
+        return self._mutate_bulk('AdGroupCriterionService', operations, partial_failure)
 
     def get_campaigns_changes(self, campaign_ids, start_date, end_date):
         """
@@ -614,9 +1274,275 @@ class AdwordsAPI(object):
     def download_report_with_awql(self, path, query, report_format='CSV', skip_report_header=True,
                                   skip_column_header=True, skip_report_summary=True,
                                   include_zero_impressions=True):
-        report_downloader = self.client.GetReportDownloader(version=self.version)
+        report_downloader = self.get_report_downloader()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
         with open(path, 'w') as output_file:
             report_downloader.DownloadReportWithAwql(
                 query, report_format, output_file, skip_report_header=skip_report_header,
                 skip_column_header=skip_column_header, skip_report_summary=skip_report_summary,
                 include_zero_impressions=include_zero_impressions)
+
+    def iter_report_with_awql(self, query, records=False, compressed=False, skip_column_header=True,
+                              skip_report_summary=True, include_zero_impressions=True):
+        """
+            Stream report rows straight from the HTTP response, in constant memory
+
+            Args:
+                query (str): AWQL query
+                records (bool): yield namedtuples with query fields as attributes instead of tuples
+                compressed (bool): download gzipped CSV, decompressed while reading
+                skip_column_header (bool): don't yield the column names row
+                skip_report_summary (bool): don't yield the totals row
+
+            Yields:
+                report rows
+
+            Examples:
+                >>> query = 'SELECT CampaignId, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING YESTERDAY'
+                >>> for row in iter_report_with_awql(query, records=True):
+                ...     print(row.CampaignId, row.Clicks)
+        """
+        row_type = record_type(parse_awql_fields(query)) if records else None
+        report_downloader = self.get_report_downloader()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = report_downloader.DownloadReportAsStreamWithAwql(
+            query, 'GZIPPED_CSV' if compressed else 'CSV', skip_report_header=True,
+            skip_column_header=skip_column_header, skip_report_summary=skip_report_summary,
+            include_zero_impressions=include_zero_impressions)
+        try:
+            for row in iter_csv_rows(response, compressed=compressed):
+                yield row_type(*row) if row_type else tuple(row)
+        finally:
+            response.close()
+
+    def _download_report(self, path, query, report_format='CSV', customer_id=None, **options):
+        """
+            Stream a report into `path`, the file is replaced only when the download succeeds.
+        """
+        report_downloader = self.get_report_downloader()
+        if customer_id is not None:
+            options['client_customer_id'] = customer_id
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with atomic_file(path) as output_file:
+            response = report_downloader.DownloadReportAsStreamWithAwql(query, report_format, **options)
+            try:
+                shutil.copyfileobj(response, output_file)
+            finally:
+                response.close()
+
+    def download_reports_with_awql(self, query, customer_ids, path=None, merged_path=None, workers=4,
+                                   report_format='CSV', skip_column_header=True, skip_report_summary=True,
+                                   include_zero_impressions=True):
+        """
+            Download the same report for many accounts concurrently
+
+            All downloads share this instance's OAuth credentials and report downloader,
+            only the customer id header changes. A failed account doesn't stop the others.
+
+            Args:
+                query (str): AWQL query
+                customer_ids (list): accounts to download the report for
+                path (str): file per account, formatted with `customer_id`
+                merged_path (str): single CSV file with customer id as the first column instead
+                workers (int): concurrent downloads
+
+            Returns:
+                list of ReportResult in `customer_ids` order
+
+            Examples:
+                >>> download_reports_with_awql(query, [123, 456], path='/tmp/report-{customer_id}.csv')
+                >>> download_reports_with_awql(query, [123, 456], merged_path='/tmp/report.csv')
+        """
+        if (path is None) == (merged_path is None):
+            raise ValueError('Exactly one of path and merged_path is required.')
+        if merged_path is not None and report_format != 'CSV':
+            raise ValueError('Only CSV reports can be merged.')
+
+        options = {
+            'skip_report_header': True,
+            'skip_column_header': skip_column_header,
+            'skip_report_summary': skip_report_summary,
+            'include_zero_impressions': include_zero_impressions,
+        }
+        tmp_dir = None
+        if merged_path is not None:
+            tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(merged_path)))
+            path = os.path.join(tmp_dir, '{customer_id}.csv')
+
+        def download(customer_id):
+            account_path = path.format(customer_id=customer_id)
+            try:
+                self._download_report(account_path, query, report_format, customer_id, **options)
+            except Exception as e:
+                return ReportResult(customer_id, None, e)
+            return ReportResult(customer_id, account_path, None)
+
+        executor = futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            results = list(executor.map(download, customer_ids))
+            if merged_path is not None:
+                parts = [(result.customer_id, result.path) for result in results if result.ok]
+                with atomic_file(merged_path) as output_file:
+                    merge_reports(parts, output_file, column_header=not skip_column_header)
+                results = [result._replace(path=merged_path) if result.ok else result for result in results]
+        finally:
+            executor.shutdown()
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        return results
+
+    def _download_shard(self, path, query, report_format, options):
+        """
+            Download one shard of a sharded report, retrying it on its own.
+        """
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                return self._download_report(path, query, report_format, **options)
+            except AdWordsReportBadRequestError:
+                raise
+            except Exception:
+                attempt += 1
+                if attempt > self.retry_policy.retries:
+                    raise
+                self.retry_policy.wait(attempt, started=started)
+
+    def _download_shards(self, query, shards, tmp_dir, workers, report_format, options):
+        """
+            Download `query` for every (start, end) in `shards`, return shard files in the same order.
+        """
+        def download(shard):
+            start, end = shard
+            path = os.path.join(tmp_dir, '{:%Y%m%d}-{:%Y%m%d}'.format(start, end))
+            self._download_shard(path, with_awql_during(query, start, end), report_format, options)
+            return path
+
+        executor = futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            return list(executor.map(download, shards))
+        finally:
+            executor.shutdown()
+
+    def download_sharded_report_with_awql(self, path, query, shard_days=7, workers=4, report_format='CSV',
+                                          skip_column_header=True, include_zero_impressions=True):
+        """
+            Download a report over a long date range in parallel date shards
+
+            The DURING range of `query` is split into ranges of `shard_days` days, which are
+            downloaded concurrently and retried separately, then written to `path` in date order.
+            Shards never include report header or summary rows.
+
+            Args:
+                path (str): output file, replaced only when all shards succeed
+                query (str): AWQL query ending with DURING yyyymmdd,yyyymmdd
+                shard_days (int): days per shard, 1 for daily shards, 7 for weekly
+                workers (int): concurrent downloads
+                report_format (str): CSV or TSV
+
+            Examples:
+                >>> query = 'SELECT Date, Clicks FROM KEYWORDS_PERFORMANCE_REPORT DURING 20170101,20170331'
+                >>> download_sharded_report_with_awql('/tmp/keywords.csv', query, shard_days=7)
+        """
+        if report_format not in ('CSV', 'TSV'):
+            raise ValueError('Only CSV and TSV reports can be sharded.')
+        query, start, end = parse_awql_during(query)
+        options = {
+            'skip_report_header': True,
+            'skip_column_header': skip_column_header,
+            'skip_report_summary': True,
+            'include_zero_impressions': include_zero_impressions,
+        }
+
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            paths = self._download_shards(query, date_shards(start, end, shard_days), tmp_dir, workers,
+                                          report_format, options)
+            with atomic_file(path) as output_file:
+                concat_reports(paths, output_file, column_header=not skip_column_header)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def download_cached_report_with_awql(self, path, query, workers=4, report_format='CSV',
+                                         skip_column_header=True, include_zero_impressions=True):
+        """
+            Download a report over a date range, reusing days stored in `report_cache`
+
+            The DURING range of `query` is split into single days. Days found in the cache are
+            used as they are, the rest are downloaded concurrently and cached unless they are
+            within the cache's mutable window. Days are written to `path` in date order.
+
+            Args:
+                path (str): output file, replaced only when all days are available
+                query (str): AWQL query ending with DURING yyyymmdd,yyyymmdd
+                workers (int): concurrent downloads
+                report_format (str): CSV or TSV
+
+            Examples:
+                >>> query = 'SELECT Date, Clicks FROM KEYWORDS_PERFORMANCE_REPORT DURING 20170101,20170331'
+                >>> download_cached_report_with_awql('/tmp/keywords.csv', query)
+        """
+        if self.report_cache is None:
+            raise ValueError('download_cached_report_with_awql needs AdwordsAPI(report_cache=...).')
+        if report_format not in ('CSV', 'TSV'):
+            raise ValueError('Only CSV and TSV reports can be cached.')
+        query, start, end = parse_awql_during(query)
+        options = {
+            'skip_report_header': True,
+            'skip_column_header': skip_column_header,
+            'skip_report_summary': True,
+            'include_zero_impressions': include_zero_impressions,
+        }
+
+        days = [day for day, _ in date_shards(start, end, 1)]
+        keys = [self.report_cache.key(query, self.account_id, day, report_format=report_format, **options)
+                for day in days]
+        paths = [self.report_cache.get(key) for key in keys]
+        missing = [i for i, cached_path in enumerate(paths) if cached_path is None]
+
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            shards = [(days[i], days[i]) for i in missing]
+            downloaded = self._download_shards(query, shards, tmp_dir, workers, report_format, options)
+            for i, day_path in zip(missing, downloaded):
+                paths[i] = day_path
+                if not self.report_cache.is_mutable(days[i]):
+                    self.report_cache.put(keys[i], day_path)
+
+            with atomic_file(path) as output_file:
+                concat_reports(paths, output_file, column_header=not skip_column_header)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def get_report_columns_with_awql(self, query, include_zero_impressions=True):
+        """
+            Download a CSV report into memory and return it as typed numpy columns
+
+            Money fields are int64 micros, dates datetime64[D], see `adwordspy.columnar`.
+            Needs numpy (pip install adwordspy[numpy]).
+
+            Args:
+                query (str): AWQL query
+
+            Returns:
+                OrderedDict field -> numpy array
+
+            Examples:
+                >>> query = 'SELECT Date, CampaignId, Clicks, Cost FROM CAMPAIGN_PERFORMANCE_REPORT DURING LAST_7_DAYS'
+                >>> columns = get_report_columns_with_awql(query)
+                >>> columns['Cost'][columns['CampaignId'] == 384642878].sum()
+        """
+        report_downloader = self.get_report_downloader()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = report_downloader.DownloadReportAsStreamWithAwql(
+            query, 'CSV', skip_report_header=True, skip_column_header=True, skip_report_summary=True,
+            include_zero_impressions=include_zero_impressions)
+        try:
+            data = response.read()
+        finally:
+            response.close()
+        return load_columns(data, parse_awql_fields(query))
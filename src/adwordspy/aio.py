@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+    asyncio interface to the Adwords API (Python 3.5+).
+
+    suds only does blocking I/O, so every SOAP call is run in a thread pool
+    while the event loop multiplexes many accounts and services. A semaphore
+    bounds the number of calls in flight; pass the same `semaphore` and
+    `executor` to several clients to share one limit across accounts.
+"""
+import asyncio
+import functools
+import itertools
+from concurrent import futures
+
+from adwordspy.adwords import AdwordsAPI
+from adwordspy.records import to_record
+
+try:
+    _running_loop = asyncio.get_running_loop
+except AttributeError:  # Python < 3.7, inside a coroutine this is the running loop
+    _running_loop = asyncio.get_event_loop
+
+# report rows read per executor call by iter_report_with_awql
+ROWS_PER_CALL = 1000
+
+
+class AsyncAdwordsAPI(AdwordsAPI):
+    """
+        Same interface as `AdwordsAPI`, but `get_*` methods and `iter_report_with_awql`
+        return async iterators, and `set_*_status(es)`, `flush`, `get_campaigns_changes`
+        and the report downloads are coroutines run in the executor.
+
+        Write behind mode (`write_behind`) and `entity_cache` are not supported,
+        mutations are always sent right away and reads always hit the API.
+
+        Examples:
+            >>> adwords = AsyncAdwordsAPI(account_id, ..., concurrency=20)
+            >>> async for campaign in adwords.get_campaigns():
+            ...     print(campaign.name)
+            >>> await adwords.set_adgroup_status(1234, 'PAUSED')
+    """
+
+    def __init__(self, *args, concurrency=10, executor=None, semaphore=None, **kwargs):
+        super(AsyncAdwordsAPI, self).__init__(*args, **kwargs)
+        if self.mutation_queue is not None:
+            raise ValueError('AsyncAdwordsAPI doesn\'t support write_behind.')
+        if self.entity_cache is not None:
+            raise ValueError('AsyncAdwordsAPI doesn\'t support entity_cache.')
+        self.concurrency = concurrency
+        self._own_executor = executor is None
+        self.executor = executor
+        self._semaphore = semaphore
+
+    async def _run(self, fn, *args):
+        """
+            Run blocking `fn` in the executor, respecting the concurrency limit.
+        """
+        if self.executor is None:
+            self.executor = futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await _running_loop().run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def _blocking(self, name, *args, **kwargs):
+        """
+            Run `AdwordsAPI` method `name` in the executor.
+        """
+        return await self._run(functools.partial(getattr(super(AsyncAdwordsAPI, self), name), *args, **kwargs))
+
+    def close(self):
+        """
+            Shut down the executor if it was created by this client.
+        """
+        super(AsyncAdwordsAPI, self).close()
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def _get(self, name, selector):
+        return self._get_page(self._thread_service(name), selector, name, refresh=self._refresh_thread_service)
+
+    def _mutate(self, name, operations):
+        self._mutate_operation(self._thread_service(name), operations)
+
+    def get_custom_service(self, name, selector, pagination=True, cache=True):
+        # there is no entity cache, `cache` is accepted for compatibility with AdwordsAPI
+        return _AsyncEntries(self, name, selector, pagination)
+
+    def _get_chunked(self, name, selector, ids):
+        selectors = self._chunk_selectors(selector, ids)
+        if selectors is None:
+            return self.get_custom_service(name, selector)
+        if self.chunk_workers <= 1:
+            return _AsyncChain(self.get_custom_service(name, s) for s in selectors)
+        return _AsyncChunks(self, name, selectors)
+
+    async def set_adgroup_status(self, adgroup_id, status):
+        operations = [self._adgroup_status_operation(adgroup_id, status)]
+        await self._run(self._mutate, 'AdGroupService', operations)
+
+    async def set_ad_status(self, ad_group_id, ad_id, status):
+        operations = [self._ad_status_operation(ad_group_id, ad_id, status)]
+        await self._run(self._mutate, 'AdGroupAdService', operations)
+
+    async def set_keyword_status(self, adgroup_id, keyword_id, status):
+        operations = [self._keyword_status_operation(adgroup_id, keyword_id, status)]
+        await self._run(self._mutate, 'AdGroupCriterionService', operations)
+
+    async def set_adgroup_statuses(self, statuses, partial_failure=False):
+        operations = [self._adgroup_status_operation(*item) for item in statuses]
+        return await self._run(self._mutate_bulk, 'AdGroupService', operations, partial_failure, True)
+
+    async def set_ad_statuses(self, statuses, partial_failure=False):
+        operations = [self._ad_status_operation(*item) for item in statuses]
+        return await self._run(self._mutate_bulk, 'AdGroupAdService', operations, partial_failure, True)
+
+    async def set_keyword_statuses(self, statuses, partial_failure=False):
+        operations = [self._keyword_status_operation(*item) for item in statuses]
+        return await self._run(self._mutate_bulk, 'AdGroupCriterionService', operations, partial_failure, True)
+
+    async def flush(self):
+        return await self._blocking('flush')
+
+    async def get_campaigns_changes(self, campaign_ids, start_date, end_date):
+        selector = {
+            'dateTimeRange': {
+                'min': start_date,
+                'max': end_date
+            },
+            'campaignIds': campaign_ids,
+        }
+        return await self._run(self._get, 'CustomerSyncService', selector)
+
+    async def download_report_with_awql(self, path, query, **kwargs):
+        await self._blocking('download_report_with_awql', path, query, **kwargs)
+
+    async def download_reports_with_awql(self, query, customer_ids, **kwargs):
+        return await self._blocking('download_reports_with_awql', query, customer_ids, **kwargs)
+
+    async def download_sharded_report_with_awql(self, path, query, **kwargs):
+        await self._blocking('download_sharded_report_with_awql', path, query, **kwargs)
+
+    async def download_cached_report_with_awql(self, path, query, **kwargs):
+        await self._blocking('download_cached_report_with_awql', path, query, **kwargs)
+
+    async def get_report_columns_with_awql(self, query, **kwargs):
+        return await self._blocking('get_report_columns_with_awql', query, **kwargs)
+
+    def iter_report_with_awql(self, query, **kwargs):
+        rows = super(AsyncAdwordsAPI, self).iter_report_with_awql(query, **kwargs)
+        return _AsyncRows(self, rows)
+
+
+class _AsyncEntries(object):
+    """
+        Async iterator over entries of a selector, fetching one page per executor call.
+    """
+
+    def __init__(self, api, name, selector, pagination):
+        self.api = api
+        self.name = name
+        self.selector = selector
+        self.pagination = pagination
+        self.offset = 0
+        self.total = None
+        self.entries = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            for entry in self.entries:
+                return entry
+            page = await self._next_page()
+            if page is None:
+                raise StopAsyncIteration
+            entries = page['entries'] if 'entries' in page else []
+            if self.api.records and self.pagination:
+                entries = [to_record(entry) for entry in entries]
+            self.entries = iter(entries)
+
+    async def _next_page(self):
+        if not self.pagination:
+            if self.total is not None:
+                return None
+            self.total = 1
+            page = await self.api._run(self.api._get, self.name, self.selector)
+            # not paged, the result itself is the only entry
+            return {'entries': [page]}
+
+        if self.total is not None and self.offset >= self.total:
+            return None
+        page = await self.api._run(self.api._fetch_page, self.selector, self.name, self.offset)
+        self.total = self.api._total_entries(page)
+        self.offset += self.api.page_size
+        return page
+
+
+class _AsyncChain(object):
+    """
+        Async iterator over the entries of several async iterators, one after another.
+    """
+
+    def __init__(self, iterators):
+        self.iterators = iter(iterators)
+        self.current = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self.current is None:
+                self.current = next(self.iterators, None)
+                if self.current is None:
+                    raise StopAsyncIteration
+            try:
+                return await self.current.__anext__()
+            except StopAsyncIteration:
+                self.current = None
+
+
+class _AsyncChunks(object):
+    """
+        Async iterator over entries of chunk `selectors` of one id list.
+
+        Chunks are collected by concurrent tasks, up to twice `chunk_workers` at a time,
+        every page request still waits for the semaphore.
+        With `ordered_chunks` entries are returned in chunk order, otherwise a chunk
+        is returned as soon as it's collected.
+    """
+
+    def __init__(self, api, name, selectors):
+        self.api = api
+        self.name = name
+        self.selectors = iter(selectors)
+        self.in_flight = 2 * api.chunk_workers
+        self.pending = None
+        self.entries = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            for entry in self.entries:
+                return entry
+            entries = await self._next_chunk()
+            if entries is None:
+                raise StopAsyncIteration
+            self.entries = iter(entries)
+
+    async def _collect(self, selector):
+        entries = []
+        async for entry in self.api.get_custom_service(self.name, selector):
+            entries.append(entry)
+        return entries
+
+    def _submit(self, count):
+        for selector in itertools.islice(self.selectors, count):
+            self.pending.append(asyncio.ensure_future(self._collect(selector)))
+
+    async def _next_chunk(self):
+        if self.pending is None:
+            self.pending = []
+            self._submit(self.in_flight)
+        if not self.pending:
+            return None
+
+        if self.api.ordered_chunks:
+            task = self.pending.pop(0)
+        else:
+            done, _ = await asyncio.wait(self.pending, return_when=asyncio.FIRST_COMPLETED)
+            task = next(t for t in self.pending if t in done)
+            self.pending.remove(task)
+        try:
+            entries = await task
+        except BaseException:
+            for pending in self.pending:
+                pending.cancel()
+            self.pending = []
+            raise
+        self._submit(1)
+        return entries
+
+
+class _AsyncRows(object):
+    """
+        Async iterator over a blocking report row generator, reading `ROWS_PER_CALL` rows per executor call.
+    """
+
+    def __init__(self, api, rows):
+        self.api = api
+        self.rows = rows
+        self.batch = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for row in self.batch:
+            return row
+        batch = await self.api._run(self._read)
+        if not batch:
+            raise StopAsyncIteration
+        self.batch = iter(batch)
+        return next(self.batch)
+
+    def _read(self):
+        return list(itertools.islice(self.rows, ROWS_PER_CALL))
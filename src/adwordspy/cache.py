@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+
+import suds
+import suds.cache
+
+from adwordspy.utils import atomic_file
+from adwordspy.utils import atomic_write
+from adwordspy.utils import makedirs
+
+
+class ServiceCache(object):
+    """
+        On-disk cache of built service definitions (WSDL with its schema model).
+
+        Entries are pickled suds objects stored under
+        `location/<suds version>-py<major>/<api version>/<service name>/`, so
+        several processes and `AdwordsAPI` instances can share one directory.
+        Writes are atomic, which makes concurrent warm-up from many workers safe.
+
+        Args:
+            location (str): cache directory, defaults to `~/.cache/adwordspy`
+
+        Examples:
+            >>> cache = ServiceCache('/tmp/adwordspy-cache')
+            >>> adwords = AdwordsAPI(..., service_cache=cache)
+            >>> cache.invalidate('CampaignService')
+    """
+
+    def __init__(self, location=None):
+        if location is None:
+            location = os.path.join(os.path.expanduser('~'), '.cache', 'adwordspy')
+        self.location = location
+        self.root = os.path.join(location, '{}-py{}'.format(suds.__version__, sys.version_info[0]))
+
+    def bucket(self, version, name):
+        """
+            Return a suds cache for service `name` of API `version`.
+        """
+        return _ServiceBucket(os.path.join(self.root, version, name))
+
+    def invalidate(self, name=None, version=None):
+        """
+            Remove cached definitions.
+
+            Args:
+                name (str): service name, all services if None
+                version (str): API version, all versions if None
+        """
+        if not os.path.isdir(self.root):
+            return
+        versions = [version] if version else os.listdir(self.root)
+        for v in versions:
+            path = os.path.join(self.root, v)
+            if name:
+                path = os.path.join(path, name)
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class _ServiceBucket(suds.cache.Cache):
+    """
+        suds cache storing pickled objects for a single service.
+    """
+    protocol = 2
+
+    def __init__(self, location):
+        self.location = makedirs(location)
+
+    def _filename(self, id):
+        return os.path.join(self.location, '{}.px'.format(id))
+
+    def get(self, id):
+        try:
+            with open(self._filename(id), 'rb') as f:
+                return pickle.load(f)
+        except IOError:
+            return None
+        except Exception:
+            # corrupted or incompatible entry, it will be rebuilt
+            self.purge(id)
+            return None
+
+    def put(self, id, object):
+        try:
+            atomic_write(self._filename(id), pickle.dumps(object, self.protocol))
+        except (IOError, OSError):
+            pass
+        return object
+
+    def purge(self, id):
+        try:
+            os.remove(self._filename(id))
+        except OSError:
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+        makedirs(self.location)
+
+
+class ReportCache(object):
+    """
+        Content addressed on-disk cache of single day reports.
+
+        Report data for days older than the conversion window doesn't change, so a
+        day is cached under a hash of the normalized query, customer id, date and
+        download options. The last `mutable_days` days (today included) are never
+        cached. When the cache grows over `max_bytes` the least recently used
+        entries are removed.
+
+        Args:
+            location (str): cache directory
+            mutable_days (int): how many recent days are always downloaded again
+            max_bytes (int): size limit of the cache
+
+        Examples:
+            >>> cache = ReportCache('/var/cache/adwords-reports', mutable_days=3)
+            >>> adwords = AdwordsAPI(..., report_cache=cache)
+            >>> adwords.download_cached_report_with_awql('/tmp/report.csv', query)
+    """
+
+    def __init__(self, location, mutable_days=3, max_bytes=1024 ** 3):
+        self.location = makedirs(location)
+        self.mutable_days = mutable_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query, customer_id, day, **options):
+        """
+            Cache key of `query` (without DURING) for `customer_id` on `day`.
+        """
+        normalized = ' '.join(query.split())
+        parts = [normalized, str(customer_id), day.isoformat()]
+        parts.extend('{}={}'.format(name, options[name]) for name in sorted(options))
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def is_mutable(self, day, today=None):
+        """
+            Data for `day` may still change and must not be cached.
+        """
+        today = today or datetime.date.today()
+        return day > today - datetime.timedelta(days=self.mutable_days)
+
+    def _path(self, key):
+        return os.path.join(self.location, key[:2], key)
+
+    def get(self, key):
+        """
+            Path of the cached report for `key`, or None.
+        """
+        path = self._path(key)
+        try:
+            # mtime is the LRU clock
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, path):
+        """
+            Store a copy of report file `path` under `key`.
+        """
+        cached_path = self._path(key)
+        makedirs(os.path.dirname(cached_path))
+        with open(path, 'rb') as src:
+            with atomic_file(cached_path) as dst:
+                shutil.copyfileobj(src, dst)
+        self.evict()
+        return cached_path
+
+    def evict(self):
+        """
+            Remove least recently used entries until the cache fits in `max_bytes`.
+        """
+        with self._lock:
+            entries = []
+            for directory, _, filenames in os.walk(self.location):
+                for filename in filenames:
+                    path = os.path.join(directory, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+
+class EntityCache(object):
+    """
+        In-memory read-through cache of `get_*` results.
+
+        Entries of a selector are cached under the service name, the account and a
+        hash of the canonical JSON form of the selector, so the same fields and
+        predicates in any order hit the same key, and one cache can be shared by
+        clients of many accounts. Every service has its own TTL. When more than
+        `max_entities` entities are cached, least recently used results are dropped.
+        `set_*_status` calls invalidate cached results of the mutated service for
+        the account they were made for.
+
+        Cached entities are shared between callers and must not be modified.
+
+        Args:
+            ttl (float): seconds a result is valid, for services not in `ttls`
+            ttls (dict): service name -> TTL in seconds
+            max_entities (int): size limit, in number of cached entities
+
+        Examples:
+            >>> cache = EntityCache(ttl=30, ttls={'CampaignService': 300})
+            >>> adwords = AdwordsAPI(..., entity_cache=cache)
+            >>> list(adwords.get_campaigns())  # API
+            >>> list(adwords.get_campaigns())  # cache
+    """
+
+    def __init__(self, ttl=60, ttls=None, max_entities=100000):
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.max_entities = max_entities
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name, selector, account_id):
+        """
+            Cache key of `selector` for service `name` of account `account_id`, paging is ignored.
+        """
+        selector = dict((k, v) for k, v in selector.items() if k != 'paging')
+        for k in ('fields', 'predicates'):
+            if k in selector:
+                selector[k] = sorted(selector[k], key=lambda item: json.dumps(item, sort_keys=True, default=str))
+        canonical = json.dumps(selector, sort_keys=True, default=str)
+        return name, str(account_id), hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+            Cached entries for `key`, or None when missing or expired.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entries = item
+            if time.time() >= expires:
+                self._remove(key)
+                return None
+            # most recently used entries are at the end
+            del self._entries[key]
+            self._entries[key] = item
+            return entries
+
+    def put(self, key, entries):
+        """
+            Cache `entries` (list) for `key`.
+        """
+        ttl = self.ttls.get(key[0], self.ttl)
+        if not ttl or len(entries) > self.max_entities:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.time() + ttl, entries)
+            self._size += len(entries)
+            while self._size > self.max_entities:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, name=None, account_id=None):
+        """
+            Drop cached results of service `name` for account `account_id`, of all services
+            or accounts if None.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if (name is None or key[0] == name) and (account_id is None or key[1] == str(account_id)):
+                    self._remove(key)
+
+    def _remove(self, key):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._size -= len(item[1])
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import io
+import re
+import warnings
+
+from adwordspy.reports import iter_csv_rows
+
+try:
+    import numpy
+except ImportError:  # optional, pip install adwordspy[numpy]
+    numpy = None
+
+# numpy's loadtxt parses quoted fields since 1.23 (Python 3.8+)
+LOADTXT_QUOTECHAR = numpy is not None and tuple(int(v) for v in numpy.__version__.split('.')[:2]) >= (1, 23)
+
+# money fields are reported in micros
+MICROS_FIELDS = re.compile(r'(Cost|Cpc|Cpm|Cpv|Bid|Amount)$')
+INTEGER_FIELDS = re.compile(r'(Id|Clicks|Impressions|Views|Interactions)$')
+FLOAT_FIELDS = re.compile(r'(Ctr|Rate|Position|Conversions|Share)$')
+DATE_FIELDS = ('Date', 'Day')
+
+# AdWords writes this for values which are not available
+MISSING = ('--', ' --')
+
+
+def column_type(field):
+    """
+        numpy dtype for report column `field`.
+    """
+    if field in DATE_FIELDS:
+        return 'datetime64[D]'
+    if MICROS_FIELDS.search(field) or INTEGER_FIELDS.search(field):
+        return 'int64'
+    if FLOAT_FIELDS.search(field):
+        return 'float64'
+    return 'object'
+
+
+def _convert(values, dtype):
+    """
+        Convert `values`, a numpy array of report strings, to `dtype` in vectorized steps.
+    """
+    if dtype == 'object' or not len(values):
+        return values.astype(dtype)
+
+    missing = (values == MISSING[0]) | (values == MISSING[1])
+    if dtype == 'datetime64[D]':
+        return numpy.where(missing, 'NaT', values).astype(dtype)
+
+    values = numpy.char.replace(numpy.where(missing, '0', values), ',', '')
+    if dtype == 'float64':
+        values = numpy.char.rstrip(values, '%').astype(dtype)
+        values[missing] = numpy.nan
+        return values
+    values = values.astype(dtype)
+    if missing.any():
+        # integers have no NaN, missing values are masked instead of passing for zeros
+        return numpy.ma.masked_array(values, mask=missing)
+    return values
+
+
+def _load_strings(data, size):
+    """
+        Parse CSV bytes `data` into a 2D numpy array of strings with `size` columns.
+
+        numpy parses the whole buffer in one pass. Older numpy versions can't parse
+        quoted fields, reports with quotes are read by the csv module there.
+    """
+    if not LOADTXT_QUOTECHAR and b'"' in data:
+        rows = list(iter_csv_rows(io.BytesIO(data)))
+        return numpy.array(rows, dtype=str) if rows else numpy.empty((0, size), dtype=str)
+
+    options = {'quotechar': '"'} if LOADTXT_QUOTECHAR else {}
+    text = io.StringIO(data.decode('utf-8'))
+    with warnings.catch_warnings():
+        # an empty report isn't worth a warning
+        warnings.filterwarnings('ignore', message='loadtxt: (input contained no data|Empty input file)')
+        table = numpy.loadtxt(text, dtype=str, delimiter=',', comments=None, ndmin=2, **options)
+    if not table.size:
+        return numpy.empty((0, size), dtype=str)
+    return table
+
+
+def load_columns(data, fields):
+    """
+        Parse a CSV report into one numpy array per column.
+
+        The whole report is parsed by numpy's CSV reader into one string array, which is
+        converted column by column, no Python object is made per row or value. Money
+        fields stay integer micros, ids and counts are int64 (masked arrays when values
+        are missing), percentages and rates float64 (NaN when missing), dates
+        datetime64[D] (NaT when missing) and anything else object arrays.
+
+        Args:
+            data: bytes or binary file object with the CSV report, without header rows
+            fields (list): column names, e.g. from `parse_awql_fields`
+
+        Returns:
+            OrderedDict field -> numpy array
+
+        Examples:
+            >>> columns = load_columns(b'2017-01-01,12,3400000\\n', ['Date', 'Clicks', 'Cost'])
+            >>> columns['Cost'].sum()
+    """
+    if numpy is None:
+        raise ImportError('numpy is required for columnar reports, install adwordspy[numpy]')
+    if not isinstance(data, bytes):
+        data = data.read()
+
+    table = _load_strings(data, len(fields))
+    return collections.OrderedDict(
+        (field, _convert(table[:, i], column_type(field))) for i, field in enumerate(fields))
+
+
+def concat_columns(tables):
+    """
+        Concatenate column dicts returned by `load_columns`, e.g. of several accounts.
+    """
+    if numpy is None:
+        raise ImportError('numpy is required for columnar reports, install adwordspy[numpy]')
+    tables = list(tables)
+    if not tables:
+        return collections.OrderedDict()
+    # numpy.ma.concatenate keeps the masks of missing integers
+    return collections.OrderedDict(
+        (field, numpy.ma.concatenate([table[field] for table in tables])
+         if any(numpy.ma.isMaskedArray(table[field]) for table in tables)
+         else numpy.concatenate([table[field] for table in tables])) for field in tables[0])
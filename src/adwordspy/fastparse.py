@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import threading
+import xml.etree.ElementTree as ElementTree
+
+from suds.plugin import PluginContainer
+from suds.transport import Request
+from suds.transport import TransportError
+
+XSD_CONVERTERS = {
+    'long': int,
+    'int': int,
+    'double': float,
+    'boolean': lambda text: text == 'true',
+}
+
+_hints = {}
+_hints_lock = threading.Lock()
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def schema_hints(suds_client):
+    """
+        Element names which repeat and converters of numeric and boolean elements.
+
+        Hints are collected by name from all complex types of the service schema,
+        a name declared with conflicting types is left as text. They are computed
+        once per WSDL.
+
+        Returns:
+            (set of list element names, dict element name -> converter)
+    """
+    url = suds_client.wsdl.url
+    hints = _hints.get(url)
+    if hints is None:
+        with _hints_lock:
+            hints = _hints.get(url)
+            if hints is None:
+                hints = _hints[url] = _collect_hints(suds_client.wsdl.schema)
+    return hints
+
+
+def _collect_hints(schema):
+    lists = set()
+    types = {}
+    for complex_type in schema.types.values():
+        for child, _ in complex_type.children():
+            if child.name is None:
+                continue
+            if child.max is not None and child.max != '1':
+                lists.add(child.name)
+            types.setdefault(child.name, set()).add(child.type[0] if child.type else None)
+    converters = {}
+    for name, xsd_types in types.items():
+        if len(xsd_types) == 1:
+            converter = XSD_CONVERTERS.get(next(iter(xsd_types)))
+            if converter is not None:
+                converters[name] = converter
+    return lists, converters
+
+
+def parse_response(xml, hints, result_tag='rval'):
+    """
+        Parse a raw SOAP response straight into dicts, lists and scalars.
+
+        Complex elements become dicts keyed by element name, repeated elements
+        lists and numeric and boolean elements are converted with schema `hints`.
+        Everything else is text.
+
+        Args:
+            xml (bytes): SOAP response envelope
+            hints: result of `schema_hints`
+            result_tag (str): element holding the result in the response body
+
+        Returns:
+            dict of the result element (empty for an empty one), None if the response has none
+    """
+    lists, converters = hints
+    stack = []
+    result = None
+    inside = False
+    for event, element in ElementTree.iterparse(io.BytesIO(xml), events=('start', 'end')):
+        name = _local_name(element.tag)
+        if event == 'start':
+            if name == result_tag and not inside:
+                inside = True
+            if inside:
+                stack.append({})
+            continue
+        if not inside:
+            continue
+
+        value = stack.pop()
+        if not value and stack:
+            text = element.text or ''
+            converter = converters.get(name)
+            value = converter(text) if converter is not None and text else text
+        # parsed elements are not needed anymore
+        element.clear()
+
+        if not stack:
+            result = value
+            inside = False
+            continue
+        parent = stack[-1]
+        if name in lists:
+            parent.setdefault(name, []).append(value)
+        else:
+            parent[name] = value
+    return result
+
+
+def fast_get(service, selector):
+    """
+        Call `service.get(selector)` returning dicts instead of suds objects.
+
+        suds builds the request and SOAP headers, but the request is sent here
+        (suds `nosend` option), so successful responses skip the suds SAX parser
+        and unmarshaller entirely. HTTP errors and faults are handed back to suds,
+        which raises `WebFault` as usual. Services without a suds client are
+        called normally.
+    """
+    suds_client = getattr(service, 'suds_client', None)
+    if suds_client is None:
+        return service.get(selector)
+    hints = schema_hints(suds_client)
+    suds_client.set_options(nosend=True)
+    try:
+        context = service.get(selector)
+    finally:
+        suds_client.set_options(nosend=False)
+
+    request = Request(context.client.location(), context.envelope)
+    request.headers = context.client.headers()
+    try:
+        reply = suds_client.options.transport.send(request)
+    except TransportError as e:
+        content = e.fp and e.fp.read() or b''
+        return context.process_reply(content, e.httpcode, str(e))
+    xml = PluginContainer(suds_client.options.plugins).message.received(reply=reply.message).reply
+    return parse_response(xml, hints)
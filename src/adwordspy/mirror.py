@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    customer_id INTEGER PRIMARY KEY,
+    manager_id INTEGER,
+    name TEXT,
+    currency_code TEXT,
+    time_zone TEXT,
+    can_manage_clients INTEGER,
+    test_account INTEGER
+);
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    account_id INTEGER,
+    name TEXT,
+    status TEXT,
+    serving_status TEXT,
+    channel_type TEXT,
+    start_date TEXT,
+    end_date TEXT
+);
+CREATE TABLE IF NOT EXISTS adgroups (
+    id INTEGER PRIMARY KEY,
+    campaign_id INTEGER,
+    name TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS ads (
+    adgroup_id INTEGER,
+    id INTEGER,
+    type TEXT,
+    status TEXT,
+    PRIMARY KEY (adgroup_id, id)
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    adgroup_id INTEGER,
+    id INTEGER,
+    text TEXT,
+    match_type TEXT,
+    status TEXT,
+    PRIMARY KEY (adgroup_id, id)
+);
+CREATE INDEX IF NOT EXISTS accounts_manager_id ON accounts (manager_id);
+CREATE INDEX IF NOT EXISTS campaigns_account_id ON campaigns (account_id);
+CREATE INDEX IF NOT EXISTS campaigns_status ON campaigns (status);
+CREATE INDEX IF NOT EXISTS adgroups_campaign_id ON adgroups (campaign_id);
+CREATE INDEX IF NOT EXISTS adgroups_status ON adgroups (status);
+CREATE INDEX IF NOT EXISTS ads_id ON ads (id);
+CREATE INDEX IF NOT EXISTS ads_status ON ads (status);
+CREATE INDEX IF NOT EXISTS keywords_id ON keywords (id);
+CREATE INDEX IF NOT EXISTS keywords_status ON keywords (status);
+"""
+
+# get_ads and get_keywords return only ids by default, the mirror needs these fields
+AD_FIELDS = ['Id', 'AdGroupId', 'Status']
+KEYWORD_FIELDS = ['Id', 'AdGroupId', 'KeywordText', 'KeywordMatchType', 'Status']
+
+# stored campaigns and ad groups of an account, load_snapshot removes those missing from the snapshot
+STORED_CAMPAIGNS = 'SELECT id FROM campaigns WHERE account_id = ?'
+STORED_ADGROUPS = 'SELECT a.id FROM adgroups a JOIN campaigns c ON c.id = a.campaign_id WHERE c.account_id = ?'
+
+
+def _get(entity, *path):
+    """
+        Nested value of a suds object or dict, None if any part is missing.
+    """
+    for name in path:
+        if entity is None or name not in entity:
+            return None
+        entity = entity[name]
+    return entity
+
+
+def _bool(value):
+    return None if value is None else int(bool(value))
+
+
+class Mirror(object):
+    """
+        Local SQLite replica of the account hierarchy.
+
+        Accounts, campaigns, ad groups, ads and keywords are bulk loaded with one
+        transaction per batch and indexed by id, status and parent id. Loading the
+        same entities again replaces the stored rows, so a mirror is refreshed by
+        loading again (or loading an `IncrementalSync` snapshot).
+
+        Args:
+            path (str): database file, in memory by default
+
+        Examples:
+            >>> mirror = Mirror('/var/lib/adwords.sqlite')
+            >>> mirror.load(adwords)
+            >>> mirror.query(
+            ...     "SELECT k.* FROM keywords k JOIN adgroups a ON a.id = k.adgroup_id "
+            ...     "WHERE k.status = 'PAUSED' AND a.status = 'ENABLED'")
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def query(self, sql, params=()):
+        """
+            Run a read query and return all rows (sqlite3.Row).
+        """
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def _write(self, table, columns, rows):
+        """
+            Insert or replace `rows`, without a transaction of its own, the caller holds the lock.
+        """
+        sql = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            table, ', '.join(columns), ', '.join('?' * len(columns)))
+        return self.connection.executemany(sql, rows).rowcount
+
+    def _upsert(self, table, columns, rows):
+        with self._lock:
+            with self.connection:
+                return self._write(table, columns, rows)
+
+    @staticmethod
+    def _account_rows(accounts, manager_id):
+        rows = ((_get(a, 'customerId'), manager_id, _get(a, 'name'), _get(a, 'currencyCode'),
+                 _get(a, 'dateTimeZone'), _bool(_get(a, 'canManageClients')), _bool(_get(a, 'testAccount')))
+                for a in accounts)
+        return 'accounts', ('customer_id', 'manager_id', 'name', 'currency_code', 'time_zone',
+                            'can_manage_clients', 'test_account'), rows
+
+    @staticmethod
+    def _campaign_rows(campaigns, account_id):
+        rows = ((_get(c, 'id'), account_id, _get(c, 'name'), _get(c, 'status'), _get(c, 'servingStatus'),
+                 _get(c, 'advertisingChannelType'), _get(c, 'startDate'), _get(c, 'endDate'))
+                for c in campaigns)
+        return 'campaigns', ('id', 'account_id', 'name', 'status', 'serving_status', 'channel_type',
+                             'start_date', 'end_date'), rows
+
+    @staticmethod
+    def _adgroup_rows(adgroups):
+        rows = ((_get(a, 'id'), _get(a, 'campaignId'), _get(a, 'name'), _get(a, 'status')) for a in adgroups)
+        return 'adgroups', ('id', 'campaign_id', 'name', 'status'), rows
+
+    @staticmethod
+    def _ad_rows(ads):
+        rows = ((_get(a, 'adGroupId'), _get(a, 'ad', 'id'), _get(a, 'ad', 'Ad.Type'), _get(a, 'status')) for a in ads)
+        return 'ads', ('adgroup_id', 'id', 'type', 'status'), rows
+
+    @staticmethod
+    def _keyword_rows(keywords):
+        rows = ((_get(k, 'adGroupId'), _get(k, 'criterion', 'id'), _get(k, 'criterion', 'text'),
+                 _get(k, 'criterion', 'matchType'), _get(k, 'userStatus'))
+                for k in keywords)
+        return 'keywords', ('adgroup_id', 'id', 'text', 'match_type', 'status'), rows
+
+    def upsert_accounts(self, accounts, manager_id=None):
+        """
+            Store ManagedCustomer entities, e.g. from `get_accounts`.
+        """
+        return self._upsert(*self._account_rows(accounts, manager_id))
+
+    def upsert_campaigns(self, campaigns, account_id=None):
+        """
+            Store Campaign entities, e.g. from `get_campaigns`.
+        """
+        return self._upsert(*self._campaign_rows(campaigns, account_id))
+
+    def upsert_adgroups(self, adgroups):
+        """
+            Store AdGroup entities, e.g. from `get_adgroups`.
+        """
+        return self._upsert(*self._adgroup_rows(adgroups))
+
+    def upsert_ads(self, ads):
+        """
+            Store AdGroupAd entities, e.g. from `get_ads`.
+        """
+        return self._upsert(*self._ad_rows(ads))
+
+    def upsert_keywords(self, keywords):
+        """
+            Store AdGroupCriterion entities with Keyword criteria, e.g. from `get_keywords`.
+        """
+        return self._upsert(*self._keyword_rows(keywords))
+
+    def load(self, api):
+        """
+            Load (or refresh) campaigns, ad groups, ads and keywords of `api`'s account.
+        """
+        campaigns = list(api.get_campaigns())
+        self.upsert_campaigns(campaigns, api.account_id)
+        campaign_ids = [c['id'] for c in campaigns]
+        if not campaign_ids:
+            return
+        adgroups = list(api.get_adgroups(campaign_ids))
+        self.upsert_adgroups(adgroups)
+        adgroup_ids = [a['id'] for a in adgroups]
+        if not adgroup_ids:
+            return
+        self.upsert_ads(api.get_ads(adgroup_ids, fields=AD_FIELDS))
+        self.upsert_keywords(api.get_keywords(adgroup_ids, fields=KEYWORD_FIELDS))
+
+    def load_accounts(self, api):
+        """
+            Load (or refresh) all accounts managed by `api`'s account.
+        """
+        self.upsert_accounts(api.get_accounts(), manager_id=api.account_id)
+
+    def load_snapshot(self, snapshot):
+        """
+            Replace the snapshot's account with the entities of an `adwordspy.sync.Snapshot`.
+
+            Campaigns of the account which are not in the snapshot are removed and ad
+            groups, ads and keywords of its campaigns are replaced, so removed entities
+            disappear from the mirror too. Everything is written in one transaction,
+            readers never see a partly loaded snapshot.
+        """
+        with self._lock:
+            with self.connection:
+                account = (snapshot.account_id,)
+                stored_campaigns = self.connection.execute(STORED_CAMPAIGNS, account).fetchall()
+                stored_adgroups = self.connection.execute(STORED_ADGROUPS, account).fetchall()
+                campaign_ids = [(row[0],) for row in stored_campaigns if row[0] not in snapshot.campaigns]
+                adgroup_ids = set(row[0] for row in stored_adgroups).union(snapshot.adgroups)
+                adgroup_ids = [(adgroup_id,) for adgroup_id in adgroup_ids]
+                self.connection.executemany('DELETE FROM campaigns WHERE id = ?', campaign_ids)
+                self.connection.executemany('DELETE FROM adgroups WHERE id = ?', adgroup_ids)
+                self.connection.executemany('DELETE FROM ads WHERE adgroup_id = ?', adgroup_ids)
+                self.connection.executemany('DELETE FROM keywords WHERE adgroup_id = ?', adgroup_ids)
+                self._write(*self._campaign_rows(snapshot.campaigns.values(), snapshot.account_id))
+                self._write(*self._adgroup_rows(snapshot.adgroups.values()))
+                self._write(*self._ad_rows(snapshot.ads.values()))
+                self._write(*self._keyword_rows(snapshot.keywords.values()))
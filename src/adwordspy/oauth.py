@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import calendar
+import datetime
+import hashlib
+import json
+import threading
+import time
+
+from googleads import oauth2
+
+from adwordspy.utils import ProcessLock
+from adwordspy.utils import atomic_write
+
+EPOCH = datetime.datetime(1970, 1, 1)
+# Google access tokens are valid for an hour
+DEFAULT_TOKEN_LIFETIME = 3600
+
+
+class TokenCache(object):
+    """
+        Access tokens shared by all OAuth clients of a process and, with `path`,
+        by all processes on a host.
+
+        Tokens are keyed by a hash of (client_id, refresh_token). A client refreshes
+        only when the cached token expires within `refresh_ahead` seconds, while
+        holding the cache lock, so the other clients wait and reuse its token
+        instead of refreshing too.
+
+        Args:
+            path (str): JSON file with tokens, a `.lock` file is created next to it
+            refresh_ahead (float): refresh tokens this many seconds before they expire
+
+        Examples:
+            >>> cache = TokenCache('/tmp/adwords-tokens.json')
+            >>> adwords = AdwordsAPI(..., token_cache=cache)
+    """
+    # shared by all caches of the process
+    _tokens = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path=None, refresh_ahead=300):
+        self.path = path
+        self.lock_path = path + '.lock' if path else None
+        self.refresh_ahead = refresh_ahead
+
+    @staticmethod
+    def key(client_id, refresh_token):
+        return hashlib.sha1('{}\n{}'.format(client_id, refresh_token).encode('utf-8')).hexdigest()
+
+    def locked(self):
+        """
+            Lock to hold while reading, refreshing and storing a token.
+        """
+        if self.path is None:
+            return self._lock
+        return ProcessLock(self._lock, self.lock_path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def get(self, key):
+        """
+            (access token, expiry timestamp) valid for at least `refresh_ahead`, or None.
+        """
+        tokens = [self._tokens.get(key)]
+        if self.path is not None:
+            tokens.append(self._load().get(key))
+        tokens = [tuple(token) for token in tokens if token]
+        if not tokens:
+            return None
+        token = max(tokens, key=lambda token: token[1])
+        if token[1] - time.time() <= self.refresh_ahead:
+            return None
+        return token
+
+    def put(self, key, access_token, expiry):
+        self._tokens[key] = (access_token, expiry)
+        if self.path is not None:
+            tokens = self._load()
+            now = time.time()
+            # drop expired tokens of other clients
+            tokens = dict((k, v) for k, v in tokens.items() if v[1] > now)
+            tokens[key] = [access_token, expiry]
+            atomic_write(self.path, json.dumps(tokens).encode('utf-8'))
+
+
+class CachedRefreshTokenClient(oauth2.GoogleRefreshTokenClient):
+    """
+        GoogleRefreshTokenClient which gets its access token from a `TokenCache`.
+
+        Args:
+            client_id (str): OAuth client id
+            client_secret (str): OAuth client secret
+            refresh_token (str): refresh token
+            cache (TokenCache): shared token cache, an in-process one by default
+    """
+
+    def __init__(self, client_id, client_secret, refresh_token, cache=None, proxy_config=None):
+        oauth2.GoogleRefreshTokenClient.__init__(self, client_id, client_secret, refresh_token, proxy_config)
+        self.cache = cache or TokenCache()
+        self.key = TokenCache.key(client_id, refresh_token)
+
+    def _expires_soon(self):
+        expiry = self.oauth2credentials.token_expiry
+        if expiry is None:
+            return False
+        return calendar.timegm(expiry.utctimetuple()) - time.time() <= self.cache.refresh_ahead
+
+    def CreateHttpHeader(self):
+        if self._expires_soon():
+            self.Refresh()
+        header = {}
+        self.oauth2credentials.apply(header)
+        return header
+
+    def Refresh(self):
+        """
+            Use the cached access token, refresh it only if it's missing or about to expire.
+        """
+        with self.cache.locked():
+            token = self.cache.get(self.key)
+            if token is None:
+                oauth2.GoogleRefreshTokenClient.Refresh(self)
+                credentials = self.oauth2credentials
+                if credentials.token_expiry is None:
+                    expiry = time.time() + DEFAULT_TOKEN_LIFETIME
+                else:
+                    expiry = calendar.timegm(credentials.token_expiry.utctimetuple())
+                self.cache.put(self.key, credentials.access_token, expiry)
+                return
+        access_token, expiry = token
+        self.oauth2credentials.access_token = access_token
+        self.oauth2credentials.token_expiry = EPOCH + datetime.timedelta(seconds=expiry)
+        self.oauth2credentials.invalid = False
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import threading
+from concurrent import futures
+
+
+class AccountPool(object):
+    """
+        Warmed per-account clients made from one `AdwordsAPI`.
+
+        The manager client is built once and every account client is made with
+        `AdwordsAPI.for_customer`, sharing its OAuth client and loaded services.
+        Up to `max_size` account clients are kept for reuse, least recently used
+        ones are dropped after sending their queued mutations.
+
+        Args:
+            api (AdwordsAPI): client of the manager account
+            max_size (int): number of account clients kept
+
+        Examples:
+            >>> pool = AccountPool(AdwordsAPI(manager_id, ...))
+            >>> with pool.customer(1234567890) as adwords:
+            ...     campaigns = list(adwords.get_campaigns())
+            >>> counts = pool.map(lambda adwords: len(list(adwords.get_campaigns())), pool.customer_ids())
+    """
+
+    def __init__(self, api, max_size=100):
+        self.api = api
+        self.max_size = max_size
+        self._clients = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, customer_id):
+        """
+            Client for account `customer_id`.
+        """
+        evicted = []
+        with self._lock:
+            api = self._clients.pop(customer_id, None)
+            if api is None:
+                api = self.api.for_customer(customer_id)
+            self._clients[customer_id] = api
+            while len(self._clients) > self.max_size:
+                evicted.append(self._clients.popitem(last=False)[1])
+        # write behind mutations of dropped clients would be lost otherwise
+        for evicted_api in evicted:
+            evicted_api.flush()
+        return api
+
+    @contextlib.contextmanager
+    def customer(self, customer_id):
+        """
+            Context with the client of account `customer_id`, flushing its queued mutations on exit.
+
+            Mutations queued before an exception are flushed too, they were made on purpose.
+        """
+        api = self.get(customer_id)
+        try:
+            yield api
+        finally:
+            api.flush()
+
+    def close(self):
+        """
+            Flush queued mutations of all kept account clients.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+        for api in clients:
+            api.flush()
+
+    def customer_ids(self, **kwargs):
+        """
+            Ids of accounts managed by the pool's account, arguments are passed to `get_accounts`.
+        """
+        return [account['customerId'] for account in self.api.get_accounts(**kwargs)]
+
+    def map(self, fn, customer_ids, workers=4):
+        """
+            Call `fn(api)` for every account, `workers` accounts at a time.
+
+            Returns:
+                list of results in `customer_ids` order, exceptions are raised
+        """
+        executor = futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            return list(executor.map(lambda customer_id: fn(self.get(customer_id)), customer_ids))
+        finally:
+            executor.shutdown()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import threading
+import time
+
+from adwordspy.utils import ProcessLock
+from adwordspy.utils import atomic_write
+
+
+class TokenBucket(object):
+    """
+        Token bucket shared by all threads using it.
+
+        Every API call takes one token, tokens are refilled at `rate` per second up to
+        `capacity`. When the API answers with RateExceededError the whole bucket is
+        paused for `retryAfterSeconds`, so no other caller keeps hitting the limit.
+
+        Args:
+            rate (float): tokens added per second
+            capacity (float): maximum burst, defaults to `rate`
+
+        Examples:
+            >>> limiter = TokenBucket(rate=10)
+            >>> first = AdwordsAPI(..., rate_limiter=limiter)
+            >>> second = AdwordsAPI(..., rate_limiter=limiter)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._lock = threading.Lock()
+        self._state = {'tokens': self.capacity, 'updated': time.time(), 'paused_until': 0}
+
+    def _load(self):
+        return self._state
+
+    def _save(self, state):
+        self._state = state
+
+    def _locked(self):
+        return self._lock
+
+    def _take(self, tokens):
+        """
+            Take `tokens` if available, otherwise return seconds to wait.
+        """
+        with self._locked():
+            state = self._load()
+            now = time.time()
+            if now < state['paused_until']:
+                return state['paused_until'] - now
+            available = min(self.capacity, state['tokens'] + (now - state['updated']) * self.rate)
+            if available >= tokens:
+                self._save({'tokens': available - tokens, 'updated': now, 'paused_until': state['paused_until']})
+                return 0
+            return (tokens - available) / self.rate
+
+    def acquire(self, tokens=1):
+        """
+            Block until `tokens` are available and take them.
+        """
+        wait = self._take(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._take(tokens)
+
+    def pause(self, seconds):
+        """
+            Stop handing out tokens for `seconds`.
+        """
+        with self._locked():
+            state = self._load()
+            paused_until = max(state['paused_until'], time.time() + seconds)
+            self._save({'tokens': 0, 'updated': paused_until, 'paused_until': paused_until})
+
+
+class FileTokenBucket(TokenBucket):
+    """
+        Token bucket shared by processes on one host through a state file.
+
+        Args:
+            path (str): state file, a `.lock` file is created next to it
+            rate (float): tokens added per second
+            capacity (float): maximum burst, defaults to `rate`
+
+        Examples:
+            >>> limiter = FileTokenBucket('/tmp/adwords-token.bucket', rate=10)
+    """
+
+    def __init__(self, path, rate, capacity=None):
+        TokenBucket.__init__(self, rate, capacity)
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    def _locked(self):
+        return ProcessLock(self._lock, self.lock_path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {'tokens': self.capacity, 'updated': time.time(), 'paused_until': 0}
+
+    def _save(self, state):
+        atomic_write(self.path, json.dumps(state).encode('utf-8'))
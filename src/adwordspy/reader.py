@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import array
+import io
+import mmap
+import os
+import pickle
+
+from adwordspy.reports import iter_csv_rows
+from adwordspy.utils import atomic_write
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+
+
+class ReportReader(object):
+    """
+        Random access to a downloaded CSV report through a memory map.
+
+        On first open the file is scanned once to build an index of row offsets
+        and, for every column in `keys`, of row numbers per value. The index is
+        stored next to the report (`<path>.idx`) and reused as long as the report
+        size and mtime don't change, so later opens don't parse the file again.
+        Rows are only decoded when they are read.
+
+        Args:
+            path (str): report file, e.g. written by `download_report_with_awql`
+            fields (list): column names, if None the first row is the column header
+            keys (list): columns to index for `lookup`
+            encoding (str): text encoding of the report
+
+        Examples:
+            >>> with ReportReader('/tmp/report.csv', keys=['CampaignId']) as report:
+            ...     rows = report.lookup('CampaignId', 384642878)
+            ...     for row in report.rows(1000000):
+            ...         print(row)
+    """
+
+    def __init__(self, path, fields=None, keys=(), encoding='utf-8'):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        # empty files can't be mapped
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        self.fields = fields
+        index = self._load_index(keys)
+        if index is None:
+            index = self._build_index(keys)
+            self._save_index(index)
+        self._offsets = index['offsets']
+        self._keys = index['keys']
+        if fields is None:
+            self.fields = index['fields']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError('row {} out of range'.format(n))
+        return self._parse(self._data[self._offsets[n]:self._offsets[n + 1]])
+
+    def rows(self, start=0, stop=None):
+        """
+            Yield rows `start` to `stop` (exclusive) without touching the rest of the file.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return
+        chunk = self._data[self._offsets[start]:self._offsets[stop]]
+        for row in iter_csv_rows(io.BytesIO(chunk), encoding=self.encoding):
+            yield row
+
+    def lookup(self, column, value):
+        """
+            All rows where indexed `column` equals `value`, in file order.
+        """
+        if column not in self._keys:
+            raise KeyError('column {} is not indexed'.format(column))
+        return [self[n] for n in self._keys[column].get('{}'.format(value), ())]
+
+    def _parse(self, record):
+        return next(iter_csv_rows(io.BytesIO(record), encoding=self.encoding))
+
+    def _stat(self):
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime
+
+    def _iter_records(self):
+        """
+            Yield (start, end) offsets of CSV records, which may span several lines.
+        """
+        data = self._data
+        start = position = 0
+        quotes = 0
+        while position < len(data):
+            end = data.find(b'\n', position)
+            end = len(data) if end == -1 else end + 1
+            quotes += data[position:end].count(b'"')
+            position = end
+            # a newline inside quotes doesn't end the record
+            if quotes % 2 == 0:
+                yield start, end
+                start = end
+                quotes = 0
+        if start < len(data):
+            yield start, len(data)
+
+    def _build_index(self, keys):
+        offsets = array.array(str('q'))
+        fields = self.fields
+        columns = None
+        index = dict((key, {}) for key in keys)
+
+        for start, end in self._iter_records():
+            if fields is None:
+                fields = self._parse(self._data[start:end])
+                continue
+            row_number = len(offsets)
+            offsets.append(start)
+            if keys:
+                if columns is None:
+                    columns = [(key, fields.index(key)) for key in keys]
+                row = self._parse(self._data[start:end])
+                for key, column in columns:
+                    index[key].setdefault(row[column], []).append(row_number)
+        offsets.append(len(self._data))
+
+        size, mtime = self._stat()
+        return {
+            'version': INDEX_VERSION,
+            'size': size,
+            'mtime': mtime,
+            'fields': fields or [],
+            'offsets': offsets,
+            'keys': index,
+        }
+
+    def _load_index(self, keys):
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = pickle.load(f)
+        except Exception:
+            # missing, corrupted or incompatible index, it will be rebuilt
+            return None
+        size, mtime = self._stat()
+        if index.get('version') != INDEX_VERSION or (index['size'], index['mtime']) != (size, mtime):
+            return None
+        if not set(keys) <= set(index['keys']):
+            return None
+        return index
+
+    def _save_index(self, index):
+        try:
+            atomic_write(self.index_path, pickle.dumps(index, 2))
+        except (IOError, OSError):
+            # read-only location, the index is just not persisted
+            pass
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+    Compact records for API entities.
+
+    suds objects carry a per-instance dict, key list, printer and metadata. Records
+    are instances of small `__slots__` classes, one class per entity type and set of
+    returned fields, holding only the values. They keep the item access of suds
+    objects (`record['id']`, `'id' in record`), so code written for suds entries
+    works unchanged.
+"""
+from __future__ import unicode_literals
+
+import re
+import threading
+
+import suds.sudsobject
+
+from adwordspy.reports import PY2
+
+if PY2:
+    text_type = unicode  # noqa: F821
+else:
+    text_type = str
+
+INVALID_ATTRIBUTE = re.compile(r'\W')
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+
+class Record(object):
+    """
+        Base class of generated record classes.
+    """
+    __slots__ = ()
+    _type = None
+    _fields = ()
+    _attributes = {}
+
+    def __init__(self, *values):
+        for attribute, value in zip(self.__slots__, values):
+            setattr(self, attribute, value)
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, self._attributes[name])
+        except KeyError:
+            raise AttributeError("{} has no attribute '{}'".format(self._type, name))
+
+    def __contains__(self, name):
+        return name in self._attributes
+
+    def __iter__(self):
+        for field in self._fields:
+            yield field, self[field]
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{}({})'.format(self._type, ', '.join('{}={!r}'.format(field, value) for field, value in self))
+
+    def __reduce__(self):
+        return _make_record, (self._type, self._fields, self._values())
+
+    def _values(self):
+        return tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    def _asdict(self):
+        return dict((field, value._asdict() if isinstance(value, Record) else value) for field, value in self)
+
+
+def record_class(type_name, fields):
+    """
+        Record class for entity `type_name` with `fields`, created once and reused.
+    """
+    key = (type_name, tuple(fields))
+    cls = _classes.get(key)
+    if cls is None:
+        with _classes_lock:
+            cls = _classes.get(key)
+            if cls is None:
+                attributes = [INVALID_ATTRIBUTE.sub('_', field) for field in fields]
+                cls = type(str(type_name), (Record,), {
+                    '__slots__': tuple(str(attribute) for attribute in attributes),
+                    '_type': type_name,
+                    '_fields': tuple(fields),
+                    '_attributes': dict(zip(fields, attributes)),
+                })
+                _classes[key] = cls
+    return cls
+
+
+def _make_record(type_name, fields, values):
+    return record_class(type_name, fields)(*values)
+
+
+def _convert(value):
+    if isinstance(value, (suds.sudsobject.Object, dict)):
+        return to_record(value)
+    if isinstance(value, list):
+        return [_convert(item) for item in value]
+    if isinstance(value, text_type):
+        # suds Text keeps a language attribute per string
+        return text_type(value)
+    return value
+
+
+def to_record(entity):
+    """
+        Convert suds object or fast parser dict `entity` (and nested objects) to a compact record.
+
+        Examples:
+            >>> campaign = to_record(suds_campaign)
+            >>> campaign.id, campaign['name']
+    """
+    if isinstance(entity, dict):
+        # entries of the fast parser, their type is only known from the xsi type field
+        fields = list(entity)
+        type_name = next((entity[field] for field in fields if field.endswith('.Type')), 'Entity')
+    else:
+        fields = entity.__keylist__
+        type_name = entity.__class__.__name__
+    cls = record_class(type_name, fields)
+    return cls(*[_convert(entity[field]) for field in fields])
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import csv
+import datetime
+import gzip
+import io
+import re
+import shutil
+import sys
+
+PY2 = sys.version_info[0] == 2
+
+AWQL_SELECT = re.compile(r'^\s*SELECT\s+(.+?)\s+FROM\s', re.IGNORECASE | re.DOTALL)
+AWQL_DURING = re.compile(r'\s+DURING\s+(\d{8})\s*,\s*(\d{8})\s*$', re.IGNORECASE)
+AWQL_DATE_FORMAT = '%Y%m%d'
+
+
+def parse_awql_fields(query):
+    """
+        Get the list of selected fields from an AWQL query.
+
+        Examples:
+            >>> parse_awql_fields('SELECT CampaignId, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT')
+            ['CampaignId', 'Clicks']
+    """
+    match = AWQL_SELECT.match(query)
+    if match is None:
+        raise ValueError('Can not find SELECT fields in query: {}'.format(query))
+    return [field.strip() for field in match.group(1).split(',')]
+
+
+def parse_awql_during(query):
+    """
+        Split an AWQL query into the query without DURING and its date range.
+
+        Only explicit ranges are supported, named ranges like LAST_30_DAYS depend on
+        the account time zone.
+
+        Returns:
+            (query, start date, end date)
+
+        Examples:
+            >>> parse_awql_during('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170101,20170131')
+            ('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT', datetime.date(2017, 1, 1), datetime.date(2017, 1, 31))
+    """
+    match = AWQL_DURING.search(query)
+    if match is None:
+        raise ValueError('Query needs an explicit DURING yyyymmdd,yyyymmdd range: {}'.format(query))
+    start, end = [datetime.datetime.strptime(d, AWQL_DATE_FORMAT).date() for d in match.groups()]
+    if start > end:
+        raise ValueError('DURING range starts after it ends: {}'.format(query))
+    return query[:match.start()], start, end
+
+
+def with_awql_during(query, start, end):
+    """
+        Add a DURING clause for `start` - `end` (inclusive) to `query`.
+    """
+    return '{} DURING {},{}'.format(query, start.strftime(AWQL_DATE_FORMAT), end.strftime(AWQL_DATE_FORMAT))
+
+
+def date_shards(start, end, days):
+    """
+        Split `start` - `end` (inclusive) into consecutive ranges of at most `days` days.
+
+        Examples:
+            >>> date_shards(datetime.date(2017, 1, 1), datetime.date(2017, 1, 10), 7)
+            [(datetime.date(2017, 1, 1), datetime.date(2017, 1, 7)), (datetime.date(2017, 1, 8), datetime.date(2017, 1, 10))]
+    """
+    shards = []
+    step = datetime.timedelta(days=days)
+    while start <= end:
+        shard_end = min(start + step - datetime.timedelta(days=1), end)
+        shards.append((start, shard_end))
+        start = shard_end + datetime.timedelta(days=1)
+    return shards
+
+
+def concat_reports(paths, output, column_header=False):
+    """
+        Concatenate CSV/TSV report files into binary file `output`.
+
+        Args:
+            paths (list): report files, in output order
+            output: binary file object
+            column_header (bool): files start with a column names row, it's written only once
+    """
+    for i, path in enumerate(paths):
+        with open(path, 'rb') as part:
+            if column_header and i > 0:
+                part.readline()
+            shutil.copyfileobj(part, output)
+
+
+def record_type(fields):
+    """
+        namedtuple type for report rows with `fields` columns.
+    """
+    return collections.namedtuple('ReportRow', [str(field) for field in fields])
+
+
+def iter_csv_rows(stream, compressed=False, encoding='utf-8'):
+    """
+        Yield rows (lists of unicode strings) from binary CSV `stream` without reading it whole.
+
+        Args:
+            stream: file-like object returning bytes, e.g. an HTTP response
+            compressed (bool): `stream` is gzipped
+            encoding (str): text encoding of the report
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+
+    if PY2:
+        for row in csv.reader(iter(stream.readline, b'')):
+            yield [cell.decode(encoding) for cell in row]
+    else:
+        for row in csv.reader(io.TextIOWrapper(stream, encoding=encoding, newline='')):
+            yield row
+
+
+def write_csv_rows(output, rows, encoding='utf-8'):
+    """
+        Write `rows` of unicode strings as CSV to binary file `output`.
+    """
+    if PY2:
+        writer = csv.writer(output)
+        for row in rows:
+            writer.writerow([cell.encode(encoding) for cell in row])
+    else:
+        text = io.TextIOWrapper(output, encoding=encoding, newline='')
+        try:
+            csv.writer(text).writerows(rows)
+        finally:
+            # leave `output` open for the caller
+            text.detach()
+
+
+def merge_reports(parts, output, column_header=False):
+    """
+        Concatenate CSV report files into `output`, prefixing every row with its customer id.
+
+        Args:
+            parts (list): (customer_id, path) pairs, in output order
+            output: binary file object
+            column_header (bool): parts start with a column names row, it's written only once
+    """
+    header_written = False
+    for customer_id, path in parts:
+        with open(path, 'rb') as part:
+            rows = iter_csv_rows(part)
+            if column_header:
+                header = next(rows, None)
+                if header is not None and not header_written:
+                    write_csv_rows(output, [['CustomerId'] + header])
+                    header_written = True
+            customer_id = str(customer_id)
+            write_csv_rows(output, ([customer_id] + row for row in rows))
+
+
+class ReportResult(collections.namedtuple('ReportResult', ['customer_id', 'path', 'error'])):
+    """
+        Outcome of one account's download in a bulk report download.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+
+
+class OperationError(Exception):
+    """
+        Errors reported for a single operation of a partial failure mutation.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        Exception.__init__(self, ', '.join(str(error['errorString']) for error in errors))
+
+
+class MutateResult(collections.namedtuple('MutateResult', ['operation', 'value', 'error'])):
+    """
+        Outcome of a single operation sent by a bulk mutation.
+
+        `value` is the entity returned by the API, `error` the exception if the operation failed.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class MutateResults(list):
+    """
+        List of MutateResult in the order operations were given.
+    """
+
+    @property
+    def successes(self):
+        return [result for result in self if result.ok]
+
+    @property
+    def failures(self):
+        return [result for result in self if not result.ok]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import random
+import time
+
+import suds
+
+RETRY = 'retry'
+REFRESH = 'refresh'
+RAISE = 'raise'
+
+DEFAULT_RULES = {
+    'AuthenticationError': REFRESH,
+    'InternalApiError': RETRY,
+    'RateExceededError': RETRY,
+}
+
+
+class RetriesLimitException(Exception):
+    def __init__(self, retries):
+        Exception.__init__(self, 'Tried to get service {} times, but failed.'.format(retries))
+
+
+def fault_errors(fault):
+    """
+        Get the list of ApiErrors from a suds.WebFault.
+    """
+    errors = fault.fault.detail.ApiExceptionFault.errors
+    if not isinstance(errors, list):
+        errors = [errors]
+    return errors
+
+
+class RetryPolicy(object):
+    """
+        Retry SOAP calls failing with ApiErrors.
+
+        Each ApiError.Type maps to an action: `retry` waits and calls again, `refresh`
+        rebuilds the service and calls again right away, anything else raises the fault.
+        Waits use exponential backoff with full jitter, so clients failing at the same
+        time don't retry in lockstep; `retryAfterSeconds` sent with RateExceededError
+        is waited out before the jittered backoff.
+
+        Args:
+            retries (int): how many times a call is repeated before RetriesLimitException
+            base (float): backoff of the first retry in seconds
+            cap (float): maximum backoff in seconds
+            max_elapsed (float): give up when waiting would exceed this many seconds in total
+            sleep (bool): wait between retries, disable in tests
+            rules (dict): ApiError.Type -> action, merged into DEFAULT_RULES
+
+        Examples:
+            >>> policy = RetryPolicy(retries=5, max_elapsed=120, rules={'ConcurrentModificationError': RETRY})
+            >>> adwords = AdwordsAPI(..., retry_policy=policy)
+    """
+
+    def __init__(self, retries=3, base=1, cap=60, max_elapsed=None, sleep=True, rules=None):
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+        self.max_elapsed = max_elapsed
+        self.sleep = sleep
+        self.rules = dict(DEFAULT_RULES)
+        if rules:
+            self.rules.update(rules)
+
+    def action(self, errors):
+        """
+            Action for a list of ApiErrors, the strictest one wins.
+        """
+        actions = set(self.rules.get(error['ApiError.Type'], RAISE) for error in errors)
+        for action in (RAISE, REFRESH, RETRY):
+            if action in actions:
+                return action
+        return RAISE
+
+    def backoff(self, attempt, errors=()):
+        """
+            Seconds to wait before retry number `attempt` (starting at 1).
+        """
+        delay = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        retry_after = [int(error['retryAfterSeconds']) for error in errors
+                       if 'retryAfterSeconds' in error and error['retryAfterSeconds'] is not None]
+        if retry_after:
+            delay += max(retry_after)
+        return delay
+
+    def wait(self, attempt, errors=(), started=None):
+        """
+            Sleep before retry number `attempt`.
+
+            Raises:
+                RetriesLimitException: if waiting would exceed `max_elapsed`
+        """
+        delay = self.backoff(attempt, errors)
+        if self.max_elapsed is not None and started is not None:
+            if time.time() - started + delay > self.max_elapsed:
+                raise RetriesLimitException(attempt - 1)
+        if self.sleep:
+            time.sleep(delay)
+
+    def call(self, fn, service, refresh=None):
+        """
+            Return `fn(service)`, retrying according to the rules.
+
+            Args:
+                fn (callable): makes the SOAP call with the given service
+                service: service passed to `fn`
+                refresh (callable): returns a new service for `refresh` errors
+        """
+        started = time.time()
+        attempt = 0
+        while True:
+            try:
+                return fn(service)
+            except suds.WebFault as e:
+                errors = fault_errors(e)
+                action = self.action(errors)
+                if action == RAISE or (action == REFRESH and refresh is None):
+                    raise
+                attempt += 1
+                if attempt > self.retries:
+                    raise RetriesLimitException(self.retries)
+                if action == REFRESH:
+                    service = refresh()
+                else:
+                    self.wait(attempt, errors, started)
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import datetime
+import os
+import pickle
+
+import pytz
+import suds.sudsobject
+
+from adwordspy.mirror import AD_FIELDS
+from adwordspy.mirror import KEYWORD_FIELDS
+from adwordspy.records import to_record
+from adwordspy.utils import atomic_write
+from adwordspy.utils import makedirs
+
+SYNC_DATE_FORMAT = '%Y%m%d %H%M%S'
+
+# campaign and ad group change statuses which need the entity itself to be fetched again
+CHANGED = ('NEW', 'FIELDS_CHANGED')
+
+
+def _items(data, name):
+    """
+        List `name` of a suds object or dict, which may be missing or None.
+    """
+    if data is None or name not in data or data[name] is None:
+        return []
+    return list(data[name])
+
+
+def _id_filter(field, ids):
+    return [{'field': field, 'operator': 'IN', 'values': sorted(ids)}]
+
+
+def _entity(entity):
+    """
+        Picklable copy of `entity`, suds objects are converted to records.
+    """
+    if isinstance(entity, suds.sudsobject.Object):
+        return to_record(entity)
+    return entity
+
+
+def _ad_key(ad):
+    return ad['adGroupId'], ad['ad']['id']
+
+
+def _keyword_key(keyword):
+    return keyword['adGroupId'], keyword['criterion']['id']
+
+
+class Snapshot(object):
+    """
+        Local copy of an account's campaigns, ad groups, ads and keywords.
+
+        Ads and keywords are keyed by (ad group id, id), criterion ids are only
+        unique within an ad group.
+    """
+
+    def __init__(self, account_id):
+        self.account_id = account_id
+        self.watermark = None
+        self.campaigns = {}
+        self.adgroups = {}
+        self.ads = {}
+        self.keywords = {}
+
+
+class IncrementalSync(object):
+    """
+        Keep a `Snapshot` of one account up to date using CustomerSyncService.
+
+        The first sync pulls the whole hierarchy. Later syncs ask for changes since
+        the watermark of the previous one and fetch only changed campaigns, ad groups,
+        ads and keywords, so a sync without changes costs a single request. With
+        `location` the snapshot and its watermark are stored in
+        `location/<account_id>.pickle` and survive restarts.
+
+        CustomerSyncService only reports changes of known campaigns, pass
+        `discover=True` to `sync` to also look for new campaigns (one more request).
+
+        CustomerSyncService reads date ranges in the account's time zone, so
+        watermarks are taken in it too. Without `time_zone` it is looked up
+        once, on the first sync.
+
+        Args:
+            api (AdwordsAPI): client of the synced account
+            location (str): directory for persisted snapshots
+            time_zone (str): account time zone, e.g. 'America/New_York'
+
+        Examples:
+            >>> sync = IncrementalSync(adwords, location='/var/lib/adwords-sync')
+            >>> snapshot = sync.sync()
+            >>> snapshot.campaigns[384642878]['status']
+    """
+
+    def __init__(self, api, location=None, time_zone=None):
+        self.api = api
+        self.location = location
+        self.time_zone = time_zone
+        self.snapshot = self._load()
+        self._next_watermark = None
+
+    @property
+    def path(self):
+        if self.location is None:
+            return None
+        return os.path.join(self.location, '{}.pickle'.format(self.api.account_id))
+
+    def _load(self):
+        if self.path is not None:
+            try:
+                with open(self.path, 'rb') as f:
+                    return pickle.load(f)
+            except Exception:
+                # missing or unreadable snapshot, start with a full sync
+                pass
+        return Snapshot(self.api.account_id)
+
+    def _save(self):
+        if self.path is not None:
+            makedirs(self.location)
+            atomic_write(self.path, pickle.dumps(self.snapshot, 2))
+
+    def _account_time_zone(self):
+        selector = {
+            'fields': ['CustomerId', 'DateTimeZone'],
+            'predicates': [{'field': 'CustomerId', 'operator': 'EQUALS', 'values': [self.api.account_id]}],
+        }
+        for account in self.api.get_custom_service('ManagedCustomerService', selector):
+            return account['dateTimeZone']
+        raise ValueError('Can not find the time zone of account {}, pass time_zone.'.format(self.api.account_id))
+
+    def _now(self):
+        """
+            Current time in the account's time zone.
+        """
+        if self.time_zone is None:
+            self.time_zone = self._account_time_zone()
+        return datetime.datetime.now(pytz.timezone(self.time_zone)).strftime(SYNC_DATE_FORMAT)
+
+    def sync(self, discover=False):
+        """
+            Bring the snapshot up to date and return it.
+
+            Args:
+                discover (bool): also fetch campaigns which are not in the snapshot yet
+        """
+        now = self._now()
+        self._next_watermark = None
+        if self.snapshot.watermark is None:
+            self.snapshot = Snapshot(self.api.account_id)
+            self._pull(campaign_ids=None)
+        else:
+            self._incremental_sync(self.snapshot.watermark, now)
+            if discover:
+                known = set(self.snapshot.campaigns)
+                new_ids = [c['id'] for c in self.api.get_campaigns(fields=['Id']) if c['id'] not in known]
+                if new_ids:
+                    self._pull(new_ids)
+        self.snapshot.watermark = self._next_watermark or now
+        self._save()
+        return self.snapshot
+
+    def _pull(self, campaign_ids):
+        """
+            Fetch the whole hierarchy of `campaign_ids`, or of all campaigns if None.
+        """
+        api = self.api
+        snapshot = self.snapshot
+        filters = None if campaign_ids is None else _id_filter('Id', campaign_ids)
+        campaigns = dict((c['id'], _entity(c)) for c in api.get_campaigns(filters=filters))
+        snapshot.campaigns.update(campaigns)
+        if not campaigns:
+            return
+        adgroups = dict((a['id'], _entity(a)) for a in api.get_adgroups(list(campaigns)))
+        snapshot.adgroups.update(adgroups)
+        if not adgroups:
+            return
+        snapshot.ads.update((_ad_key(a), _entity(a)) for a in api.get_ads(list(adgroups), fields=AD_FIELDS))
+        keywords = api.get_keywords(list(adgroups), fields=KEYWORD_FIELDS)
+        snapshot.keywords.update((_keyword_key(k), _entity(k)) for k in keywords)
+
+    def _incremental_sync(self, watermark, now):
+        """
+            Apply changes between `watermark` and `now`.
+        """
+        if not self.snapshot.campaigns:
+            return
+
+        changes = self.api.get_campaigns_changes(list(self.snapshot.campaigns), watermark, now)
+
+        campaign_ids = set()
+        adgroup_ids = set()
+        ads = {}
+        keywords = {}
+        for campaign in _items(changes, 'changedCampaigns'):
+            if campaign['campaignChangeStatus'] in CHANGED:
+                campaign_ids.add(campaign['campaignId'])
+            for adgroup in _items(campaign, 'changedAdGroups'):
+                adgroup_id = adgroup['adGroupId']
+                if adgroup['adGroupChangeStatus'] in CHANGED:
+                    adgroup_ids.add(adgroup_id)
+                ads.setdefault(adgroup_id, set()).update(_items(adgroup, 'changedAds'))
+                keywords.setdefault(adgroup_id, set()).update(_items(adgroup, 'changedCriteria'))
+                for criterion_id in _items(adgroup, 'removedCriteria'):
+                    self.snapshot.keywords.pop((adgroup_id, criterion_id), None)
+
+        self._refresh(campaign_ids, adgroup_ids, ads, keywords)
+
+        if changes is not None and 'lastChangeTimestamp' in changes:
+            # the next sync continues from the last change the API has seen
+            self._next_watermark = changes['lastChangeTimestamp']
+
+    def _refresh(self, campaign_ids, adgroup_ids, ads, keywords):
+        """
+            Fetch changed entities again, one request per entity type.
+        """
+        api = self.api
+        snapshot = self.snapshot
+        if campaign_ids:
+            api._invalidate_entities('CampaignService')
+            for campaign in api.get_campaigns(filters=_id_filter('Id', campaign_ids)):
+                snapshot.campaigns[campaign['id']] = _entity(campaign)
+        if adgroup_ids:
+            api._invalidate_entities('AdGroupService')
+            campaigns = list(snapshot.campaigns)
+            for adgroup in api.get_adgroups(campaigns, filters=_id_filter('Id', adgroup_ids)):
+                snapshot.adgroups[adgroup['id']] = _entity(adgroup)
+
+        ad_ids = set().union(*ads.values()) if ads else set()
+        if ad_ids:
+            api._invalidate_entities('AdGroupAdService')
+            adgroups = [adgroup_id for adgroup_id, ids in ads.items() if ids]
+            for ad in api.get_ads(adgroups, filters=_id_filter('Id', ad_ids), fields=AD_FIELDS):
+                key = _ad_key(ad)
+                if ad['ad']['id'] in ads.get(key[0], ()):
+                    snapshot.ads[key] = _entity(ad)
+
+        criterion_ids = set().union(*keywords.values()) if keywords else set()
+        if criterion_ids:
+            api._invalidate_entities('AdGroupCriterionService')
+            adgroups = [adgroup_id for adgroup_id, ids in keywords.items() if ids]
+            for keyword in api.get_keywords(adgroups, filters=_id_filter('Id', criterion_ids), fields=KEYWORD_FIELDS):
+                key = _keyword_key(keyword)
+                if keyword['criterion']['id'] in keywords.get(key[0], ()):
+                    snapshot.keywords[key] = _entity(keyword)
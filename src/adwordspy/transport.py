@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+    Keep-alive HTTP connections shared by services and report downloads.
+
+    suds' default transport opens a urllib connection, and so a TCP connection and
+    TLS handshake, for every request. `ConnectionPool` keeps connections open after
+    a response is read and hands them to the next request to the same host.
+"""
+from __future__ import unicode_literals
+
+import io
+import socket
+import ssl
+import threading
+import zlib
+
+from suds.transport import Reply
+from suds.transport import Transport
+from suds.transport import TransportError
+
+from adwordspy.reports import PY2
+
+if PY2:
+    import httplib as http_client
+    from urllib2 import HTTPError
+    from urlparse import urlsplit
+else:
+    import http.client as http_client
+    from urllib.error import HTTPError
+    from urllib.parse import urlsplit
+
+
+class ConnectionPool(object):
+    """
+        Open HTTP(S) connections kept for reuse, per host.
+
+        A connection is returned to the pool once its response is read to the end,
+        a response closed early closes its connection. A kept connection the server
+        has closed meanwhile is replaced by a new one and the request is sent again.
+        The pool is thread safe, one instance can be shared by many `AdwordsAPI`
+        instances.
+
+        Args:
+            maxsize (int): idle connections kept per host
+            per_host (int): open connections per host, further requests wait for a free one; unlimited if None
+            timeout (float): socket timeout in seconds, unless a request sets its own
+            context (ssl.SSLContext): context of HTTPS connections, the default one verifies certificates
+
+        Examples:
+            >>> pool = ConnectionPool(maxsize=20, per_host=10)
+            >>> adwords = AdwordsAPI(..., connection_pool=pool)
+    """
+
+    def __init__(self, maxsize=10, per_host=None, timeout=90, context=None):
+        self.maxsize = maxsize
+        self.per_host = per_host
+        self.timeout = timeout
+        self.context = context or ssl.create_default_context()
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, key):
+        if self.per_host is None:
+            return None
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.per_host)
+        return slot
+
+    def _connect(self, key, timeout):
+        scheme, host, port = key
+        if scheme == 'https':
+            return http_client.HTTPSConnection(host, port, timeout=timeout, context=self.context)
+        return http_client.HTTPConnection(host, port, timeout=timeout)
+
+    def _get(self, key, timeout):
+        """
+            (connection, reused) for host `key`, an idle one if there is any.
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                connection = idle.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+            self.created += 1
+        return self._connect(key, timeout), False
+
+    def _put(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _discard(self, key):
+        """
+            Close the idle connections of host `key`, after one of them turned out to be closed by the server.
+        """
+        with self._lock:
+            idle = self._idle.pop(key, [])
+        for connection in idle:
+            connection.close()
+
+    def clear(self):
+        """
+            Close all idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def urlopen(self, method, url, body=None, headers=None, timeout=None):
+        """
+            Send a request on a pooled connection.
+
+            Returns:
+                PooledResponse, its connection goes back to the pool when the body is read
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if timeout is None:
+            timeout = self.timeout
+
+        slot = self._slot(key)
+        if slot is not None:
+            slot.acquire()
+        try:
+            while True:
+                connection, reused = self._get(key, timeout)
+                try:
+                    connection.request(method, path, body, headers or {})
+                    response = connection.getresponse()
+                except (socket.error, http_client.BadStatusLine) as e:
+                    connection.close()
+                    # a kept connection closed by the server fails before the request is processed
+                    if reused and not isinstance(e, socket.timeout):
+                        self._discard(key)
+                        continue
+                    raise
+                return PooledResponse(self, key, connection, response, slot, url)
+        except Exception:
+            if slot is not None:
+                slot.release()
+            raise
+
+
+class PooledResponse(io.RawIOBase):
+    """
+        File-like HTTP response, with the attributes of urllib responses.
+    """
+
+    def __init__(self, pool, key, connection, response, slot, url):
+        io.RawIOBase.__init__(self)
+        self.url = url
+        self.status = self.code = response.status
+        self.reason = self.msg = response.reason
+        self.headers = response.msg
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._slot = slot
+
+    def info(self):
+        return self.headers
+
+    def getcode(self):
+        return self.status
+
+    def geturl(self):
+        return self.url
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self._connection is None:
+            return b''
+        if size is None or size < 0:
+            data = self._response.read()
+        else:
+            data = self._response.read(size)
+        if self._response.isclosed():
+            self._release(keep=not self._response.will_close)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if self._connection is not None:
+            # the rest of the body would have to be read before the connection can be reused
+            self._release(keep=False)
+        io.RawIOBase.close(self)
+
+    def _release(self, keep):
+        connection, self._connection = self._connection, None
+        if keep:
+            self._pool._put(self._key, connection)
+        else:
+            connection.close()
+        if self._slot is not None:
+            self._slot.release()
+
+
+def _decode(message, headers):
+    encoding = headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return zlib.decompress(message, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return zlib.decompress(message)
+    return message
+
+
+class PooledTransport(Transport):
+    """
+        suds transport sending requests on connections of `pool`.
+
+        Proxies of the googleads proxy config are not used, requests go straight to the API host.
+    """
+
+    def __init__(self, pool):
+        Transport.__init__(self)
+        self.pool = pool
+
+    def _timeout(self, request):
+        return getattr(request, 'timeout', None) or self.options.timeout
+
+    def open(self, request):
+        response = self.pool.urlopen('GET', request.url, headers=request.headers, timeout=self._timeout(request))
+        try:
+            data = response.read()
+        finally:
+            response.close()
+        if response.status >= 300:
+            raise TransportError(response.reason, response.status, io.BytesIO(data))
+        return io.BytesIO(_decode(data, response.headers))
+
+    def send(self, request):
+        response = self.pool.urlopen('POST', request.url, request.message, request.headers,
+                                     timeout=self._timeout(request))
+        try:
+            message = _decode(response.read(), response.headers)
+        finally:
+            response.close()
+        if response.status in (http_client.ACCEPTED, http_client.NO_CONTENT):
+            return None
+        if response.status >= 300:
+            raise TransportError(response.reason, response.status, io.BytesIO(message))
+        return Reply(http_client.OK, dict(response.headers.items()), message)
+
+
+class PooledOpener(object):
+    """
+        Stand-in for the urllib opener of the googleads report downloader, using `pool`.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def open(self, request, timeout=None):
+        url = request.get_full_url()
+        data = request.data
+        method = request.get_method()
+        response = self.pool.urlopen(method, url, data, dict(request.header_items()), timeout=timeout)
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.headers, response)
+        return response
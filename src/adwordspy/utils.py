@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import contextlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def atomic_write(path, data):
+    """
+        Write `data` (bytes) to `path` so readers never see a partial file.
+    """
+    with atomic_file(path) as f:
+        f.write(data)
+
+
+@contextlib.contextmanager
+def atomic_file(path):
+    """
+        Binary file object which replaces `path` only when the block succeeds.
+
+        Data is written to a temporary file in the same directory and then
+        renamed over `path`, which is atomic on POSIX and on Windows (py3).
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            yield tmp_file
+        _replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def makedirs(path):
+    """
+        Create `path` (and parents) if it does not exist yet.
+    """
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    return path
+
+
+def _replace(src, dst):
+    replace = getattr(os, 'replace', None)
+    if replace is not None:
+        replace(src, dst)
+    else:
+        os.rename(src, dst)
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+        Hold an exclusive lock on `path` (created if missing) for the duration of the block.
+
+        Locks are advisory and work across processes on one host (POSIX only).
+    """
+    if fcntl is None:
+        raise RuntimeError('file locks require fcntl, which is not available on this platform')
+    with open(path, 'a+') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield lock_file
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class ProcessLock(object):
+    """
+        Thread lock plus file lock, flock alone doesn't order threads sharing a process.
+    """
+
+    def __init__(self, thread_lock, path):
+        self.thread_lock = thread_lock
+        self.path = path
+        self.file_lock = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            self.file_lock = file_lock(self.path)
+            self.file_lock.__enter__()
+        except Exception:
+            self.thread_lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            self.file_lock.__exit__(*exc_info)
+        finally:
+            self.thread_lock.release()
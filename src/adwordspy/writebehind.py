@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import collections
+import threading
+
+from adwordspy.results import MutateResult
+from adwordspy.results import MutateResults
+
+
+class MutationQueue(object):
+    """
+        Buffer mutate operations and send them in bulk.
+
+        Operations are keyed by service name and entity, a newer operation for the
+        same entity replaces the queued one (last write wins), so flapping statuses
+        never reach the API. The queue is flushed when it holds `max_size`
+        operations, `interval` seconds after the first queued operation, on
+        `flush()` and on `close()`.
+
+        Timed flushes run on a timer thread with services of their own. Operations
+        of a service which couldn't be sent at all are reported as failed
+        MutateResults, like those of failed requests, never dropped.
+
+        Args:
+            api (AdwordsAPI): api used to send the operations
+            max_size (int): flush when this many operations are queued
+            interval (float): flush this many seconds after the first queued operation, never if None
+            partial_failure (bool): send operations in partial failure mode
+            on_flush (callable): called with MutateResults of every flush
+
+        Examples:
+            >>> queue = MutationQueue(adwords, interval=5)
+            >>> queue.put('AdGroupService', 1234, operation)
+            >>> results = queue.flush()
+    """
+
+    def __init__(self, api, max_size=5000, interval=None, partial_failure=False, on_flush=None):
+        self.api = api
+        self.max_size = max_size
+        self.interval = interval
+        self.partial_failure = partial_failure
+        self.on_flush = on_flush
+        self.coalesced = 0
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def put(self, name, key, operation):
+        """
+            Queue `operation` for service `name`, replacing a queued operation for entity `key`.
+        """
+        with self._lock:
+            if self._pending.pop((name, key), None) is not None:
+                self.coalesced += 1
+            self._pending[(name, key)] = operation
+            full = len(self._pending) >= self.max_size
+            if not full and self.interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush, kwargs={'thread_service': True})
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+            Send all queued operations, grouped by service.
+
+            Returns:
+                MutateResults of the sent operations
+        """
+        return self._flush()
+
+    def _flush(self, thread_service=False):
+        # flushes are serialized so operations for one entity are never sent out of order
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, collections.OrderedDict()
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            by_service = collections.OrderedDict()
+            for (name, _), operation in pending.items():
+                by_service.setdefault(name, []).append(operation)
+
+            results = MutateResults()
+            for name, operations in by_service.items():
+                try:
+                    results.extend(self.api._mutate_bulk(name, operations, self.partial_failure,
+                                                         thread_service=thread_service))
+                except Exception as e:
+                    results.extend(MutateResult(operation, None, e) for operation in operations)
+
+        if results and self.on_flush is not None:
+            self.on_flush(results)
+        return results
+
+    def close(self):
+        """
+            Flush remaining operations and stop the timer.
+        """
+        return self.flush()
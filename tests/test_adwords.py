@@ -1,10 +1,30 @@
+import io
+import sys
+import threading
+import time
 import types
+from concurrent import futures
 
 import pytest
 
+import suds.client
+import suds.sudsobject
 import vcr
 
+from googleads import oauth2
+
 from adwordspy.adwords import AdwordsAPI
+from adwordspy.adwords import OperationError
+from adwordspy.adwords import RetriesLimitException
+from adwordspy.cache import EntityCache
+from adwordspy.cache import ReportCache
+from adwordspy.cache import ServiceCache
+from adwordspy.oauth import CachedRefreshTokenClient
+from adwordspy.oauth import TokenCache
+from adwordspy.records import Record
+from adwordspy.transport import ConnectionPool
+from adwordspy.transport import PooledOpener
+from adwordspy.transport import PooledTransport
 
 my_vcr = vcr.VCR(
     cassette_library_dir='tests/fixtures/vcr_cassettes',
@@ -31,6 +51,20 @@ def adwords_tokens():
             'fake_developer_token']
 
 
+@pytest.fixture
+def fake_adwords(adwords_tokens):
+    """
+        Make an AdwordsAPI using `service` for every service name, or services made by `build`.
+
+        The client is built lazily and real services are never built, so no cassette is needed.
+    """
+    def make(service=None, build=None, **kwargs):
+        adwords = AdwordsAPI(*adwords_tokens, **kwargs)
+        adwords._build_service = build or (lambda name, partial_failure=False: service)
+        return adwords
+    return make
+
+
 @my_vcr.use_cassette()
 def test_get_accounts(adwords_tokens_for_accounts):
     adwords = AdwordsAPI(*adwords_tokens_for_accounts)
@@ -101,6 +135,66 @@ def test_get_campaigns(adwords_tokens):
     assert 'startDate' in campaign
 
 
+def test_init__lazy_client(adwords_tokens):
+    # no cassette, building the client would need the network
+    adwords = AdwordsAPI(*adwords_tokens)
+    assert adwords._client is None
+    assert adwords.version == 'v201609'
+
+
+def test_init__token_cache(adwords_tokens):
+    adwords = AdwordsAPI(*adwords_tokens, token_cache=TokenCache())
+    assert isinstance(adwords.oauth2_client, CachedRefreshTokenClient)
+
+
+@my_vcr.use_cassette('test_get_campaigns')
+def test_init__shared_oauth2_client(adwords_tokens):
+    credentials = oauth2.GoogleRefreshTokenClient('fake_client_id', 'fake_client_secret', 'fake_refresh_token')
+    first = AdwordsAPI(1, None, None, None, 'fake_developer_token', oauth2_client=credentials)
+    second = AdwordsAPI(2, None, None, None, 'fake_developer_token', oauth2_client=credentials)
+
+    assert second.oauth2_client is credentials
+    assert first.client.oauth2_client is credentials
+    assert first.client.client_customer_id == 1
+
+
+@my_vcr.use_cassette('test_get_campaigns', allow_playback_repeats=True)
+def test_service_cache__built_definition(adwords_tokens, tmpdir, monkeypatch):
+    import suds.client
+    definitions = suds.client.Definitions
+    built = []
+
+    def build_definitions(url, options):
+        built.append(url)
+        return definitions(url, options)
+
+    monkeypatch.setattr(suds.client, 'Definitions', build_definitions)
+    cache = ServiceCache(str(tmpdir))
+
+    first = AdwordsAPI(*adwords_tokens, service_cache=cache)
+    first.get_service('CampaignService')
+    assert len(built) == 1
+
+    # a warm cache gives the built definition, the schema isn't built again
+    service = AdwordsAPI(*adwords_tokens, service_cache=cache).get_service('CampaignService')
+    assert len(built) == 1
+    assert service.suds_client.factory.create('Selector') is not None
+    assert tmpdir.join('{}-py{}'.format(suds.__version__, sys.version_info[0]), 'v201609', 'CampaignService').listdir()
+
+
+@my_vcr.use_cassette('test_get_campaigns')
+def test_connection_pool(adwords_tokens):
+    pool = ConnectionPool()
+    adwords = AdwordsAPI(*adwords_tokens, connection_pool=pool)
+
+    assert len(list(adwords.get_campaigns())) == 4
+    assert isinstance(adwords.get_service('CampaignService').suds_client.options.transport, PooledTransport)
+    adwords.client.GetReportDownloader = lambda version: FakeReportDownloader({})
+    assert isinstance(adwords.get_report_downloader().url_opener, PooledOpener)
+    assert adwords.for_customer(87654321).connection_pool is pool
+    assert pool.created == 1
+
+
 @my_vcr.use_cassette()
 def test_get_campaigns__with_fields(adwords_tokens):
     adwords = AdwordsAPI(*adwords_tokens)
@@ -370,6 +464,22 @@ def test_get_keywords(adwords_tokens):
     assert len(keywords) == 7
 
 
+@my_vcr.use_cassette('test_get_keywords')
+def test_get_keywords__fast_parse(adwords_tokens, monkeypatch):
+    adwords = AdwordsAPI(*adwords_tokens, fast_parse=True)
+
+    # successful responses never reach the suds parser
+    def parse(string):
+        raise AssertionError('suds parsed the response')
+    monkeypatch.setattr(suds.client, '_parse', parse)
+    keywords = list(adwords.get_keywords([31243092638]))
+    assert len(keywords) == 7
+    keyword = keywords[0]
+    assert isinstance(keyword, dict)
+    assert keyword['adGroupId'] == 31243092638
+    assert keyword['criterion'] == {'id': 33007321, 'type': 'KEYWORD', 'Criterion.Type': 'Keyword', 'matchType': 'BROAD'}
+
+
 @my_vcr.use_cassette()
 def test_get_keywords__with_filter(adwords_tokens):
     adwords = AdwordsAPI(*adwords_tokens)
@@ -501,3 +611,406 @@ def test_set_keyword_status(adwords_tokens):
     adwords = AdwordsAPI(*adwords_tokens)
     adwords.set_keyword_status(31243100678, 22854470, 'PAUSED')
     adwords.set_keyword_status(31243100678, 22854470, 'ENABLED')
+
+
+class FakePagedService(object):
+    def __init__(self, total):
+        self.total = total
+
+    def get(self, selector):
+        start = int(selector['paging']['startIndex'])
+        size = int(selector['paging']['numberResults'])
+        entries = list(range(start, min(start + size, self.total)))
+        return {'totalNumEntries': self.total, 'entries': entries}
+
+
+def test_get_custom_service__page_workers(fake_adwords):
+    adwords = fake_adwords(FakePagedService(95), page_size=10, page_workers=4, prefetch=3)
+
+    entries = list(adwords.get_custom_service('CampaignService', {'fields': ['Id']}))
+    assert entries == list(range(95))
+
+
+def test_refresh_thread_service__after_invalidate(fake_adwords):
+    built = []
+
+    def build_service(name, partial_failure=False):
+        built.append(name)
+        return FakePagedService(1)
+
+    adwords = fake_adwords(build=build_service)
+    adwords._thread_service('CampaignService')
+    adwords.invalidate_service_cache()
+
+    service = adwords._refresh_thread_service('CampaignService')
+    assert adwords._thread_service('CampaignService') is service
+    assert built == ['CampaignService', 'CampaignService']
+
+
+def test_get_custom_service__empty_page(fake_adwords):
+    service = FakePagedService(0)
+    service.get = lambda selector: {}
+    adwords = fake_adwords(service, page_size=10)
+
+    assert list(adwords.get_custom_service('CampaignService', {'fields': ['Id']})) == []
+
+
+def test_get_custom_service__page_workers_single_page(fake_adwords):
+    adwords = fake_adwords(FakePagedService(7), page_size=10, page_workers=4)
+
+    entries = list(adwords.get_custom_service('CampaignService', {'fields': ['Id']}))
+    assert entries == list(range(7))
+
+
+class FakeCountingService(FakePagedService):
+    def __init__(self, total):
+        super(FakeCountingService, self).__init__(total)
+        self.gets = 0
+
+    def get(self, selector):
+        self.gets += 1
+        return super(FakeCountingService, self).get(selector)
+
+    def mutate(self, operations):
+        return {'value': [o['operand'] for o in operations]}
+
+
+def test_get_campaigns__entity_cache(fake_adwords):
+    service = FakeCountingService(15)
+    adwords = fake_adwords(service, page_size=10, entity_cache=EntityCache(ttl=60))
+
+    assert list(adwords.get_campaigns(fields=['Id', 'Name'])) == list(range(15))
+    assert list(adwords.get_campaigns(fields=['Name', 'Id'])) == list(range(15))
+    assert service.gets == 2
+
+    # a partially consumed result isn't cached
+    next(adwords.get_adgroups([1], fields=['Id']))
+    list(adwords.get_adgroups([1], fields=['Id']))
+    list(adwords.get_adgroups([1], fields=['Id']))
+    assert service.gets == 5
+
+    # mutations invalidate only the mutated service
+    adwords.set_adgroup_status(1, 'PAUSED')
+    list(adwords.get_adgroups([1], fields=['Id']))
+    list(adwords.get_campaigns(fields=['Id', 'Name']))
+    assert service.gets == 7
+
+
+def test_get_adgroups__entity_cache_accounts(adwords_tokens):
+    cache = EntityCache(ttl=60)
+    first = AdwordsAPI(*adwords_tokens, entity_cache=cache)
+    second = AdwordsAPI(87654321, *adwords_tokens[1:], entity_cache=cache)
+    first_service, second_service = FakeCountingService(3), FakeCountingService(5)
+    first._build_service = lambda name, partial_failure=False: first_service
+    second._build_service = lambda name, partial_failure=False: second_service
+
+    assert list(first.get_adgroups([1], fields=['Id'])) == list(range(3))
+    assert list(second.get_adgroups([1], fields=['Id'])) == list(range(5))
+    assert list(first.get_adgroups([1], fields=['Id'])) == list(range(3))
+    assert (first_service.gets, second_service.gets) == (1, 1)
+
+    # a mutation invalidates only its own account
+    second.set_adgroup_status(1, 'PAUSED')
+    list(first.get_adgroups([1], fields=['Id']))
+    list(second.get_adgroups([1], fields=['Id']))
+    assert (first_service.gets, second_service.gets) == (1, 2)
+
+
+class FakeSudsService(object):
+    def get(self, selector):
+        campaign = suds.sudsobject.Factory.object('Campaign')
+        campaign.id = 1
+        campaign.name = 'campaign #1'
+        return {'totalNumEntries': 1, 'entries': [campaign]}
+
+
+def test_get_campaigns__records(fake_adwords):
+    adwords = fake_adwords(FakeSudsService(), records=True)
+
+    campaign, = adwords.get_campaigns(fields=['Id', 'Name'])
+    assert isinstance(campaign, Record)
+    assert (campaign.id, campaign['name']) == (1, 'campaign #1')
+
+
+class FakeSingleThreadService(FakePagedService):
+    """
+        Paged service failing when used by two threads at once, like suds services.
+    """
+
+    def __init__(self, total):
+        super(FakeSingleThreadService, self).__init__(total)
+        self.busy = threading.Lock()
+
+    def get(self, selector):
+        if not self.busy.acquire(False):
+            raise AssertionError('service used by two threads')
+        try:
+            time.sleep(0.001)
+            return super(FakeSingleThreadService, self).get(selector)
+        finally:
+            self.busy.release()
+
+
+def test_thread_safe__concurrent_iterators(fake_adwords):
+    built = []
+
+    def build_service(name, partial_failure=False):
+        built.append(name)
+        return FakeSingleThreadService(95)
+
+    adwords = fake_adwords(build=build_service, page_size=10, thread_safe=True)
+
+    def read(_):
+        return [list(adwords.get_campaigns(fields=['Id'])) for _ in range(5)]
+
+    executor = futures.ThreadPoolExecutor(max_workers=8)
+    try:
+        results = list(executor.map(read, range(16)))
+    finally:
+        executor.shutdown()
+
+    assert all(entries == list(range(95)) for result in results for entries in result)
+    assert len(built) <= 8
+
+
+@my_vcr.use_cassette('test_get_campaigns')
+def test_thread_safe__services_share_definition(adwords_tokens):
+    adwords = AdwordsAPI(*adwords_tokens, thread_safe=True)
+    services = []
+
+    def get_service():
+        services.append(adwords.get_service('CampaignService'))
+
+    threads = [threading.Thread(target=get_service) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    first, second = services
+    assert first is not second
+    assert first.suds_client.wsdl is second.suds_client.wsdl
+    assert adwords.get_service('CampaignService') is adwords.get_service('CampaignService')
+
+
+class FakeChildService(object):
+    """
+        Paged service returning two children for every parent id of the first predicate.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def get(self, selector):
+        parent_ids = selector['predicates'][0]['values']
+        if selector['paging']['startIndex'] in (0, '0'):
+            self.chunks.append(parent_ids)
+        children = [parent_id * 10 + i for parent_id in parent_ids for i in range(2)]
+        start = int(selector['paging']['startIndex'])
+        size = int(selector['paging']['numberResults'])
+        return {'totalNumEntries': len(children), 'entries': children[start:start + size]}
+
+
+@pytest.mark.parametrize('chunk_workers', [1, 4])
+def test_get_adgroups__id_chunks(fake_adwords, chunk_workers):
+    service = FakeChildService()
+    adwords = fake_adwords(service, page_size=3, id_chunk_size=10, chunk_workers=chunk_workers)
+
+    adgroups = list(adwords.get_adgroups(list(range(35)) + [3, 4], fields=['Id']))
+
+    assert adgroups == [parent_id * 10 + i for parent_id in range(35) for i in range(2)]
+    assert sorted(service.chunks) == [list(range(0, 10)), list(range(10, 20)), list(range(20, 30)), list(range(30, 35))]
+
+
+def test_get_adgroups__id_chunks_streamed(fake_adwords):
+    service = FakeChildService()
+    adwords = fake_adwords(service, page_size=3, id_chunk_size=10)
+
+    # a single chunk worker by default, the first entry needs only the first page
+    next(adwords.get_adgroups(list(range(35)), fields=['Id']))
+    assert service.chunks == [list(range(0, 10))]
+
+
+def test_get_keywords__unordered_chunks(fake_adwords):
+    adwords = fake_adwords(FakeChildService(), page_size=3, id_chunk_size=10, chunk_workers=4, ordered_chunks=False)
+
+    keywords = list(adwords.get_keywords(list(range(100)) * 2))
+
+    assert sorted(keywords) == [parent_id * 10 + i for parent_id in range(100) for i in range(2)]
+
+
+class FakeMutateService(object):
+    def __init__(self, fail_ids=(), reset_ids=()):
+        self.fail_ids = fail_ids
+        self.reset_ids = reset_ids
+        self.calls = []
+
+    def mutate(self, operations):
+        self.calls.append(operations)
+        if any(o['operand']['id'] in self.fail_ids for o in operations):
+            raise RetriesLimitException(3)
+        if any(o['operand']['id'] in self.reset_ids for o in operations):
+            raise IOError('connection reset')
+        return {'value': [o['operand'] for o in operations]}
+
+
+def test_set_adgroup_statuses(fake_adwords):
+    service = FakeMutateService(fail_ids=[3])
+    adwords = fake_adwords(service, mutate_size=2)
+
+    results = adwords.set_adgroup_statuses([(1, 'PAUSED'), (2, 'PAUSED'), (3, 'ENABLED'), (4, 'PAUSED'), (5, 'PAUSED')])
+
+    assert len(service.calls) == 3
+    assert [r.ok for r in results] == [True, True, False, False, True]
+    assert results[0].value == {'id': 1, 'status': 'PAUSED'}
+    assert isinstance(results[2].error, RetriesLimitException)
+
+
+def test_set_adgroup_statuses__transport_error(fake_adwords):
+    service = FakeMutateService(reset_ids=[1, 5])
+    adwords = fake_adwords(service, mutate_size=2, timesleep=False)
+
+    results = adwords.set_adgroup_statuses([(i, 'PAUSED') for i in range(1, 6)])
+    assert [r.ok for r in results] == [False, False, True, True, False]
+    assert isinstance(results[0].error, IOError)
+
+    results = adwords.set_adgroup_statuses([(1, 'PAUSED'), (2, 'PAUSED')], partial_failure=True)
+    assert [r.ok for r in results] == [False, False]
+
+
+def test_set_adgroup_statuses__workers(fake_adwords):
+    adwords = fake_adwords(FakeMutateService(), mutate_size=3, mutate_workers=4)
+
+    results = adwords.set_adgroup_statuses((i, 'PAUSED') for i in range(20))
+
+    assert [r.value['id'] for r in results] == list(range(20))
+    assert all(r.ok for r in results)
+
+
+class FakePartialFailureService(object):
+    """
+        Fails operations for ids in `fail_ids` with the given error type once.
+    """
+    def __init__(self, fail_ids):
+        self.fail_ids = dict(fail_ids)
+        self.calls = []
+
+    def mutate(self, operations):
+        self.calls.append([o['operand']['id'] for o in operations])
+        values, errors = [], []
+        for i, operation in enumerate(operations):
+            error_type = self.fail_ids.get(operation['operand']['id'])
+            if error_type:
+                if error_type == 'InternalApiError':
+                    del self.fail_ids[operation['operand']['id']]
+                values.append(None)
+                errors.append({'fieldPath': 'operations[{}].operand.status'.format(i),
+                               'ApiError.Type': error_type,
+                               'errorString': error_type})
+            else:
+                values.append(operation['operand'])
+        return {'value': values, 'partialFailureErrors': errors}
+
+
+def test_set_adgroup_statuses__partial_failure(fake_adwords):
+    service = FakePartialFailureService({2: 'InternalApiError', 3: 'EntityNotFound'})
+    adwords = fake_adwords(service, timesleep=False)
+
+    results = adwords.set_adgroup_statuses([(1, 'PAUSED'), (2, 'PAUSED'), (3, 'PAUSED')], partial_failure=True)
+
+    # only the operation with a retryable error is sent again
+    assert service.calls == [[1, 2, 3], [2]]
+    assert [r.value['id'] for r in results.successes] == [1, 2]
+    assert len(results.failures) == 1
+    assert results.failures[0].operation['operand']['id'] == 3
+    assert isinstance(results.failures[0].error, OperationError)
+
+
+class FakeReportDownloader(object):
+    def __init__(self, reports):
+        self.reports = reports
+
+    def DownloadReportAsStreamWithAwql(self, query, file_format, client_customer_id=None, **kwargs):
+        report = self.reports[client_customer_id]
+        if isinstance(report, Exception):
+            raise report
+        return io.BytesIO(report.encode('utf-8'))
+
+
+def test_download_reports_with_awql(adwords_tokens, tmpdir):
+    adwords = AdwordsAPI(*adwords_tokens)
+    adwords._report_downloader = FakeReportDownloader({1: u'10,a\n11,b\n', 2: ValueError('bad account'), 3: u'30,c\n'})
+    query = 'SELECT CampaignId, CampaignName FROM CAMPAIGN_PERFORMANCE_REPORT DURING YESTERDAY'
+
+    results = adwords.download_reports_with_awql(query, [1, 2, 3], path=str(tmpdir.join('report-{customer_id}.csv')))
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert tmpdir.join('report-1.csv').read() == '10,a\n11,b\n'
+    assert not tmpdir.join('report-2.csv').exists()
+    assert isinstance(results[1].error, ValueError)
+
+    merged = str(tmpdir.join('merged.csv'))
+    results = adwords.download_reports_with_awql(query, [1, 2, 3], merged_path=merged)
+
+    assert results[0].path == merged
+    assert open(merged).read().splitlines() == ['1,10,a', '1,11,b', '3,30,c']
+    assert sorted(f.basename for f in tmpdir.listdir()) == ['merged.csv', 'report-1.csv', 'report-3.csv']
+
+
+class FakeDailyReportDownloader(object):
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.queries = []
+
+    def DownloadReportAsStreamWithAwql(self, query, file_format, **kwargs):
+        self.queries.append(query)
+        start, end = query.rsplit(' ', 1)[1].split(',')
+        if start in self.fail_once:
+            self.fail_once.remove(start)
+            raise IOError('connection reset')
+        return io.BytesIO('Day,Clicks\n{},1\n{},1\n'.format(start, end).encode('utf-8'))
+
+
+def test_download_sharded_report_with_awql(adwords_tokens, tmpdir):
+    adwords = AdwordsAPI(*adwords_tokens, timesleep=False)
+    downloader = FakeDailyReportDownloader(fail_once=['20170108'])
+    adwords._report_downloader = downloader
+    query = 'SELECT Date, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170101,20170120'
+    path = str(tmpdir.join('report.csv'))
+
+    adwords.download_sharded_report_with_awql(path, query, shard_days=7, skip_column_header=False)
+
+    # the failed shard is the only one downloaded again
+    assert len(downloader.queries) == 4
+    assert open(path).read().splitlines() == [
+        'Day,Clicks',
+        '20170101,1', '20170107,1',
+        '20170108,1', '20170114,1',
+        '20170115,1', '20170120,1',
+    ]
+    assert [f.basename for f in tmpdir.listdir()] == ['report.csv']
+
+
+def test_download_cached_report_with_awql(adwords_tokens, tmpdir):
+    adwords = AdwordsAPI(*adwords_tokens, report_cache=ReportCache(str(tmpdir.join('cache'))))
+    downloader = FakeDailyReportDownloader()
+    adwords._report_downloader = downloader
+    path = str(tmpdir.join('report.csv'))
+
+    adwords.download_cached_report_with_awql(
+        path, 'SELECT Date, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170101,20170103')
+    assert len(downloader.queries) == 3
+
+    adwords.download_cached_report_with_awql(
+        path, 'SELECT Date, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170102,20170105')
+    # only days which weren't downloaded before, in any order since they are downloaded concurrently
+    assert sorted(downloader.queries[3:]) == [
+        'SELECT Date, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170104,20170104',
+        'SELECT Date, Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170105,20170105',
+    ]
+    assert open(path).read().splitlines() == [
+        'Day,Clicks', '20170102,1', '20170102,1',
+        'Day,Clicks', '20170103,1', '20170103,1',
+        'Day,Clicks', '20170104,1', '20170104,1',
+        'Day,Clicks', '20170105,1', '20170105,1',
+    ]
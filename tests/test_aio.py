@@ -0,0 +1,113 @@
+import sys
+
+import pytest
+
+from test_adwords import FakeChildService
+from test_adwords import FakeMutateService
+from test_adwords import FakePagedService
+from test_adwords import FakeReportDownloader
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 5), reason='asyncio interface requires Python 3.5+')
+
+
+@pytest.fixture
+def adwords_tokens():
+    return [12345678,
+            'fake_client_id',
+            'fake_client_secret',
+            'fake_refresh_token',
+            'fake_developer_token']
+
+
+class FakeSyncService(object):
+    def get(self, selector):
+        return {'campaignIds': selector['campaignIds']}
+
+
+def collect(loop, entries):
+    iterator = entries.__aiter__()
+    result = []
+    while True:
+        try:
+            result.append(loop.run_until_complete(iterator.__anext__()))
+        except StopAsyncIteration:  # noqa
+            return result
+
+
+def test_async_get_custom_service(adwords_tokens):
+    import asyncio
+    from adwordspy.aio import AsyncAdwordsAPI
+
+    adwords = AsyncAdwordsAPI(*adwords_tokens, page_size=10, concurrency=3)
+    services = {'CampaignService': FakePagedService(25), 'CustomerSyncService': FakeSyncService()}
+    adwords._build_service = services.get
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        campaigns = collect(loop, adwords.get_campaigns())
+        changes = loop.run_until_complete(adwords.get_campaigns_changes([1], '20170101 000000', '20170102 000000'))
+    finally:
+        adwords.close()
+        loop.close()
+
+    assert campaigns == list(range(25))
+    assert changes == {'campaignIds': [1]}
+
+
+@pytest.mark.parametrize('option', [{'write_behind': True}, {'entity_cache': object()}])
+def test_async_unsupported_options(adwords_tokens, option):
+    from adwordspy.aio import AsyncAdwordsAPI
+
+    with pytest.raises(ValueError):
+        AsyncAdwordsAPI(*adwords_tokens, **option)
+
+
+@pytest.mark.parametrize('options', [{'chunk_workers': 1}, {'chunk_workers': 4}, {'chunk_workers': 4, 'ordered_chunks': False}])
+def test_async_get_keywords__id_chunks(adwords_tokens, options):
+    import asyncio
+    from adwordspy.aio import AsyncAdwordsAPI
+
+    adwords = AsyncAdwordsAPI(*adwords_tokens, page_size=3, id_chunk_size=10, concurrency=3, **options)
+    service = FakeChildService()
+    adwords._build_service = lambda name, partial_failure=False: service
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        keywords = collect(loop, adwords.get_keywords(list(range(35)) + [3, 4]))
+    finally:
+        adwords.close()
+        loop.close()
+
+    expected = [parent_id * 10 + i for parent_id in range(35) for i in range(2)]
+    if options.get('ordered_chunks', True):
+        assert keywords == expected
+    else:
+        assert sorted(keywords) == expected
+    assert sorted(service.chunks) == [list(range(0, 10)), list(range(10, 20)), list(range(20, 30)), list(range(30, 35))]
+
+
+def test_async_blocking_methods(adwords_tokens):
+    import asyncio
+    from adwordspy.aio import AsyncAdwordsAPI
+
+    adwords = AsyncAdwordsAPI(*adwords_tokens, mutate_size=2)
+    adwords._build_service = lambda name, partial_failure=False: FakeMutateService(fail_ids=[3])
+    adwords._report_downloader = FakeReportDownloader({None: u'1,a\n2,b\n'})
+    query = 'SELECT CampaignId, CampaignName FROM CAMPAIGN_PERFORMANCE_REPORT DURING YESTERDAY'
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        statuses = adwords.set_adgroup_statuses([(1, 'PAUSED'), (2, 'PAUSED'), (3, 'PAUSED')])
+        assert asyncio.iscoroutine(statuses)
+        results = loop.run_until_complete(statuses)
+        rows = collect(loop, adwords.iter_report_with_awql(query))
+        assert loop.run_until_complete(adwords.flush()) == []
+    finally:
+        adwords.close()
+        loop.close()
+
+    assert [r.ok for r in results] == [True, True, False]
+    assert rows == [('1', 'a'), ('2', 'b')]
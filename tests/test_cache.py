@@ -0,0 +1,133 @@
+import datetime
+import os
+
+from adwordspy.cache import EntityCache
+from adwordspy.cache import ReportCache
+from adwordspy.cache import ServiceCache
+
+
+def test_service_cache__put_get(tmpdir):
+    cache = ServiceCache(str(tmpdir))
+    bucket = cache.bucket('v201609', 'CampaignService')
+
+    assert bucket.get('abc-document') is None
+    bucket.put('abc-document', {'wsdl': [1, 2, 3]})
+    assert bucket.get('abc-document') == {'wsdl': [1, 2, 3]}
+
+    # another instance sees the same entry
+    other = ServiceCache(str(tmpdir)).bucket('v201609', 'CampaignService')
+    assert other.get('abc-document') == {'wsdl': [1, 2, 3]}
+
+
+def test_service_cache__corrupted_entry(tmpdir):
+    bucket = ServiceCache(str(tmpdir)).bucket('v201609', 'CampaignService')
+    with open(os.path.join(bucket.location, 'abc-document.px'), 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert bucket.get('abc-document') is None
+    assert not os.listdir(bucket.location)
+
+
+def test_service_cache__invalidate(tmpdir):
+    cache = ServiceCache(str(tmpdir))
+    campaigns = cache.bucket('v201609', 'CampaignService')
+    adgroups = cache.bucket('v201609', 'AdGroupService')
+    campaigns.put('a', 1)
+    adgroups.put('b', 2)
+
+    cache.invalidate('CampaignService')
+    assert campaigns.get('a') is None
+    assert adgroups.get('b') == 2
+
+    cache.invalidate()
+    assert adgroups.get('b') is None
+
+
+def test_report_cache__key():
+    day = datetime.date(2017, 1, 1)
+    key = ReportCache.key('SELECT  Clicks\nFROM CAMPAIGN_PERFORMANCE_REPORT', 1, day, skip_column_header=True)
+
+    assert key == ReportCache.key('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT', 1, day, skip_column_header=True)
+    assert key != ReportCache.key('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT', 2, day, skip_column_header=True)
+    assert key != ReportCache.key('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT', 1, day, skip_column_header=False)
+
+
+def test_report_cache__mutable_window(tmpdir):
+    cache = ReportCache(str(tmpdir), mutable_days=3)
+    today = datetime.date(2017, 1, 10)
+
+    assert cache.is_mutable(datetime.date(2017, 1, 10), today)
+    assert cache.is_mutable(datetime.date(2017, 1, 8), today)
+    assert not cache.is_mutable(datetime.date(2017, 1, 7), today)
+
+
+def test_report_cache__lru(tmpdir):
+    cache = ReportCache(str(tmpdir.join('cache')), max_bytes=25)
+    report = tmpdir.join('report.csv')
+    report.write('0123456789')
+
+    cache.put('aa01', str(report))
+    cache.put('aa02', str(report))
+    os.utime(cache.get('aa01'), (1, 1))
+    os.utime(cache.get('aa02'), (2, 2))
+    cache.get('aa01')
+
+    cache.put('aa03', str(report))
+    assert cache.get('aa01') is not None
+    assert cache.get('aa02') is None
+    assert open(cache.get('aa03')).read() == '0123456789'
+
+
+def test_entity_cache__key():
+    selector = {'fields': ['Id', 'Name'], 'predicates': [{'field': 'Status', 'operator': 'IN', 'values': ['PAUSED']}]}
+    reordered = {'predicates': selector['predicates'], 'fields': ['Name', 'Id'], 'paging': {'startIndex': 0}}
+
+    key = EntityCache.key('CampaignService', selector, 1)
+    assert key == EntityCache.key('CampaignService', reordered, 1)
+    assert key != EntityCache.key('AdGroupService', selector, 1)
+    assert key != EntityCache.key('CampaignService', {'fields': ['Id']}, 1)
+    assert key != EntityCache.key('CampaignService', selector, 2)
+
+
+def test_entity_cache__ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('adwordspy.cache.time.time', lambda: now[0])
+    cache = EntityCache(ttl=10, ttls={'CampaignService': 100})
+    campaigns = EntityCache.key('CampaignService', {'fields': ['Id']}, 1)
+    adgroups = EntityCache.key('AdGroupService', {'fields': ['Id']}, 1)
+    cache.put(campaigns, [1, 2])
+    cache.put(adgroups, [3])
+
+    now[0] += 50
+    assert cache.get(campaigns) == [1, 2]
+    assert cache.get(adgroups) is None
+
+
+def test_entity_cache__lru():
+    cache = EntityCache(max_entities=4)
+    cache.put(('CampaignService', 'a'), [1, 2])
+    cache.put(('CampaignService', 'b'), [3])
+    cache.get(('CampaignService', 'a'))
+    cache.put(('CampaignService', 'c'), [4, 5])
+
+    assert cache.get(('CampaignService', 'a')) == [1, 2]
+    assert cache.get(('CampaignService', 'b')) is None
+    assert cache.get(('CampaignService', 'c')) == [4, 5]
+
+
+def test_entity_cache__invalidate():
+    cache = EntityCache()
+    campaigns = EntityCache.key('CampaignService', {'fields': ['Id']}, 1)
+    adgroups = EntityCache.key('AdGroupService', {'fields': ['Id']}, 1)
+    other_adgroups = EntityCache.key('AdGroupService', {'fields': ['Id']}, 2)
+    cache.put(campaigns, [1])
+    cache.put(adgroups, [2])
+    cache.put(other_adgroups, [3])
+
+    cache.invalidate('AdGroupService', 1)
+    assert cache.get(campaigns) == [1]
+    assert cache.get(adgroups) is None
+    assert cache.get(other_adgroups) == [3]
+
+    cache.invalidate('AdGroupService')
+    assert cache.get(other_adgroups) is None
@@ -0,0 +1,67 @@
+import pytest
+
+from adwordspy.columnar import column_type
+from adwordspy.columnar import concat_columns
+from adwordspy.columnar import load_columns
+
+numpy = pytest.importorskip('numpy')
+
+REPORT = (
+    b'2017-01-01,384642878,Campaign #1,12,3400000,1.50%\n'
+    b'2017-01-02,384642878,Campaign #1,0,0, --\n'
+)
+FIELDS = ['Date', 'CampaignId', 'CampaignName', 'Clicks', 'Cost', 'Ctr']
+
+
+def test_column_type():
+    assert column_type('Date') == 'datetime64[D]'
+    assert column_type('Cost') == 'int64'
+    assert column_type('AverageCpc') == 'int64'
+    assert column_type('AdGroupId') == 'int64'
+    assert column_type('Ctr') == 'float64'
+    assert column_type('CampaignName') == 'object'
+
+
+def test_load_columns():
+    columns = load_columns(REPORT, FIELDS)
+
+    assert list(columns) == FIELDS
+    assert columns['Date'][1] == numpy.datetime64('2017-01-02')
+    assert columns['CampaignId'].dtype == numpy.int64
+    assert columns['Cost'].sum() == 3400000
+    assert columns['Ctr'][0] == 1.5
+    assert numpy.isnan(columns['Ctr'][1])
+    assert list(columns['CampaignName']) == ['Campaign #1', 'Campaign #1']
+
+
+@pytest.mark.parametrize('quotechar', [True, False])
+def test_load_columns__quoted(monkeypatch, quotechar):
+    # numpy < 1.23 can't parse quotes
+    monkeypatch.setattr('adwordspy.columnar.LOADTXT_QUOTECHAR', quotechar)
+    columns = load_columns(b'"Campaign, ""#2""",1\n', ['CampaignName', 'Clicks'])
+    assert list(columns['CampaignName']) == ['Campaign, "#2"']
+    assert list(columns['Clicks']) == [1]
+
+
+def test_load_columns__missing_integers():
+    columns = load_columns(b'1,--\n2,3\n', ['Clicks', 'AverageCpc'])
+
+    assert columns['Clicks'].dtype == numpy.int64
+    assert not numpy.ma.isMaskedArray(columns['Clicks'])
+    assert columns['AverageCpc'].dtype == numpy.int64
+    assert list(columns['AverageCpc'].mask) == [True, False]
+    assert columns['AverageCpc'].sum() == 3
+
+    combined = concat_columns([columns, load_columns(b'4,5\n', ['Clicks', 'AverageCpc'])])
+    assert list(combined['AverageCpc'].mask) == [True, False, False]
+
+
+def test_load_columns__empty():
+    columns = load_columns(b'', FIELDS)
+    assert all(len(column) == 0 for column in columns.values())
+
+
+def test_concat_columns():
+    columns = concat_columns([load_columns(REPORT, FIELDS), load_columns(REPORT, FIELDS)])
+    assert columns['Clicks'].sum() == 24
+    assert len(columns['Date']) == 4
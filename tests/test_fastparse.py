@@ -0,0 +1,41 @@
+from adwordspy.fastparse import parse_response
+
+RESPONSE = b'''<?xml version="1.0"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Header><ResponseHeader><operations>1</operations></ResponseHeader></soap:Header>
+  <soap:Body>
+    <getResponse xmlns="https://adwords.google.com/api/adwords/cm/v201609">
+      <rval>
+        <totalNumEntries>2</totalNumEntries>
+        <entries>
+          <id>1</id>
+          <name>Campaign #1</name>
+          <labels><id>7</id><name>a</name></labels>
+          <budget/>
+        </entries>
+        <entries>
+          <id>2</id>
+          <name>123</name>
+          <trialCampaign>true</trialCampaign>
+        </entries>
+      </rval>
+    </getResponse>
+  </soap:Body>
+</soap:Envelope>
+'''
+HINTS = ({'entries', 'labels'}, {'id': int, 'totalNumEntries': int, 'trialCampaign': lambda text: text == 'true'})
+
+
+def test_parse_response():
+    page = parse_response(RESPONSE, HINTS)
+
+    assert page['totalNumEntries'] == 2
+    first, second = page['entries']
+    assert first == {'id': 1, 'name': 'Campaign #1', 'labels': [{'id': 7, 'name': 'a'}], 'budget': ''}
+    assert second == {'id': 2, 'name': '123', 'trialCampaign': True}
+
+
+def test_parse_response__empty():
+    empty = RESPONSE.replace(RESPONSE[RESPONSE.index(b'<rval>'):RESPONSE.index(b'</rval>') + 7], b'<rval/>')
+    assert parse_response(empty, HINTS) == {}
+    assert parse_response(empty.replace(b'<rval/>', b''), HINTS) is None
@@ -0,0 +1,124 @@
+import pytest
+
+from adwordspy.mirror import Mirror
+from adwordspy.sync import Snapshot
+
+ADS = [{'adGroupId': 10, 'ad': {'id': 100, 'Ad.Type': 'TEXT_AD'}, 'status': 'ENABLED'}]
+
+KEYWORDS = [
+    {'adGroupId': 10, 'criterion': {'id': 1000, 'text': 'shoes', 'matchType': 'EXACT'}, 'userStatus': 'PAUSED'},
+    {'adGroupId': 10, 'criterion': {'id': 1001, 'text': 'boots', 'matchType': 'BROAD'}, 'userStatus': 'ENABLED'},
+    {'adGroupId': 20, 'criterion': {'id': 1000, 'text': 'shoes', 'matchType': 'EXACT'}, 'userStatus': 'PAUSED'},
+]
+
+# selector field -> attribute path, the API returns only requested fields (and the ad type)
+AD_PATHS = {'Id': ('ad', 'id'), 'AdGroupId': ('adGroupId',), 'Status': ('status',)}
+KEYWORD_PATHS = {'Id': ('criterion', 'id'), 'AdGroupId': ('adGroupId',), 'KeywordText': ('criterion', 'text'),
+                 'KeywordMatchType': ('criterion', 'matchType'), 'Status': ('userStatus',)}
+
+
+def _select(entities, fields, paths, always=()):
+    selected = []
+    for entity in entities:
+        result = {}
+        for path in [paths[field] for field in fields or ['Id']] + list(always):
+            value, target = entity, result
+            for name in path[:-1]:
+                value = value[name]
+                target = target.setdefault(name, {})
+            target[path[-1]] = value[path[-1]]
+        selected.append(result)
+    return selected
+
+
+class FakeAPI(object):
+    account_id = 1234
+
+    def get_accounts(self):
+        return [{'customerId': 5678, 'name': 'account #1', 'currencyCode': 'EUR', 'canManageClients': False}]
+
+    def get_campaigns(self):
+        return [{'id': 1, 'name': 'campaign #1', 'status': 'ENABLED'},
+                {'id': 2, 'name': 'campaign #2', 'status': 'PAUSED'}]
+
+    def get_adgroups(self, campaign_ids):
+        return [{'id': 10, 'campaignId': 1, 'name': 'adgroup #1', 'status': 'ENABLED'},
+                {'id': 20, 'campaignId': 2, 'name': 'adgroup #2', 'status': 'PAUSED'}]
+
+    def get_ads(self, adgroup_ids, fields=None):
+        return _select(ADS, fields, AD_PATHS, always=[('ad', 'Ad.Type')])
+
+    def get_keywords(self, adgroup_ids, fields=None):
+        return _select(KEYWORDS, fields, KEYWORD_PATHS)
+
+
+PAUSED_KEYWORDS = (
+    "SELECT k.adgroup_id, k.text FROM keywords k JOIN adgroups a ON a.id = k.adgroup_id "
+    "WHERE k.status = 'PAUSED' AND a.status = 'ENABLED'"
+)
+
+
+def test_mirror_load(tmpdir):
+    mirror = Mirror(str(tmpdir.join('mirror.sqlite')))
+    mirror.load(FakeAPI())
+    mirror.load_accounts(FakeAPI())
+
+    assert [tuple(row) for row in mirror.query(PAUSED_KEYWORDS)] == [(10, 'shoes')]
+    assert mirror.query('SELECT account_id FROM campaigns WHERE id = 2')[0]['account_id'] == 1234
+    assert mirror.query('SELECT type FROM ads')[0]['type'] == 'TEXT_AD'
+    assert mirror.query('SELECT manager_id, can_manage_clients FROM accounts')[0]['manager_id'] == 1234
+
+    # loading again replaces rows
+    mirror.upsert_adgroups([{'id': 10, 'campaignId': 1, 'name': 'adgroup #1', 'status': 'PAUSED'}])
+    assert mirror.query(PAUSED_KEYWORDS) == []
+    assert mirror.query('SELECT count(*) FROM adgroups')[0][0] == 2
+    mirror.close()
+
+
+def test_mirror_load_snapshot():
+    api = FakeAPI()
+    mirror = Mirror()
+    mirror.load(api)
+
+    snapshot = Snapshot(api.account_id)
+    snapshot.campaigns = dict((c['id'], c) for c in api.get_campaigns())
+    snapshot.adgroups = dict((a['id'], a) for a in api.get_adgroups(None))
+    keyword = KEYWORDS[1]
+    snapshot.keywords = {(10, 1001): keyword}
+    mirror.load_snapshot(snapshot)
+
+    assert [tuple(row) for row in mirror.query('SELECT adgroup_id, id FROM keywords')] == [(10, 1001)]
+
+
+def test_mirror_load_snapshot__removed():
+    api = FakeAPI()
+    mirror = Mirror()
+    mirror.load(api)
+    mirror.upsert_campaigns([{'id': 3, 'name': 'other account', 'status': 'ENABLED'}], account_id=5678)
+
+    # campaign 2 and its ad group were removed since the mirror was loaded
+    snapshot = Snapshot(api.account_id)
+    snapshot.campaigns = {1: api.get_campaigns()[0]}
+    snapshot.adgroups = {10: api.get_adgroups(None)[0]}
+    snapshot.keywords = {(10, 1001): KEYWORDS[1]}
+    mirror.load_snapshot(snapshot)
+
+    assert [row[0] for row in mirror.query('SELECT id FROM campaigns ORDER BY id')] == [1, 3]
+    assert [row[0] for row in mirror.query('SELECT id FROM adgroups')] == [10]
+    assert [tuple(row) for row in mirror.query('SELECT adgroup_id, id FROM keywords')] == [(10, 1001)]
+
+
+def test_mirror_load_snapshot__atomic():
+    api = FakeAPI()
+    mirror = Mirror()
+    mirror.load(api)
+
+    snapshot = Snapshot(api.account_id)
+    snapshot.campaigns = {1: api.get_campaigns()[0]}
+    snapshot.keywords = {(10, 1001): 1001}
+    with pytest.raises(TypeError):
+        mirror.load_snapshot(snapshot)
+
+    # the failed load is rolled back as a whole
+    assert mirror.query('SELECT count(*) FROM campaigns')[0][0] == 2
+    assert mirror.query('SELECT count(*) FROM keywords')[0][0] == 3
@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+
+from googleads import oauth2
+
+from adwordspy.oauth import CachedRefreshTokenClient
+from adwordspy.oauth import TokenCache
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    calls = []
+
+    def refresh(client):
+        calls.append(client)
+        client.oauth2credentials.access_token = 'token-{}'.format(len(calls))
+        client.oauth2credentials.token_expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+    monkeypatch.setattr(oauth2.GoogleRefreshTokenClient, 'Refresh', refresh)
+    monkeypatch.setattr(TokenCache, '_tokens', {})
+    return calls
+
+
+def test_cached_client__shared_in_process(refreshes):
+    first = CachedRefreshTokenClient('client', 'secret', 'refresh', cache=TokenCache())
+    second = CachedRefreshTokenClient('client', 'secret', 'refresh', cache=TokenCache())
+    other = CachedRefreshTokenClient('client', 'secret', 'other refresh', cache=TokenCache())
+
+    assert first.CreateHttpHeader() == {'Authorization': 'Bearer token-1'}
+    assert second.CreateHttpHeader() == {'Authorization': 'Bearer token-1'}
+    assert other.CreateHttpHeader() == {'Authorization': 'Bearer token-2'}
+    assert len(refreshes) == 2
+
+
+def test_cached_client__shared_file(refreshes, tmpdir):
+    path = str(tmpdir.join('tokens.json'))
+    CachedRefreshTokenClient('client', 'secret', 'refresh', cache=TokenCache(path)).Refresh()
+
+    # another process starts with an empty memory cache
+    TokenCache._tokens.clear()
+    client = CachedRefreshTokenClient('client', 'secret', 'refresh', cache=TokenCache(path))
+    assert client.CreateHttpHeader() == {'Authorization': 'Bearer token-1'}
+    assert len(refreshes) == 1
+
+
+def test_cached_client__refresh_ahead(refreshes):
+    cache = TokenCache(refresh_ahead=3700)
+    client = CachedRefreshTokenClient('client', 'secret', 'refresh', cache=cache)
+
+    client.CreateHttpHeader()
+    # the cached token expires within refresh_ahead, so it's refreshed again
+    assert client.CreateHttpHeader() == {'Authorization': 'Bearer token-2'}
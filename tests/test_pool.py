@@ -0,0 +1,84 @@
+import pytest
+
+import vcr
+
+from adwordspy.adwords import AdwordsAPI
+from adwordspy.pool import AccountPool
+
+my_vcr = vcr.VCR(
+    cassette_library_dir='tests/fixtures/vcr_cassettes',
+    record_mode='none',
+    match_on=['uri', 'method'],
+)
+
+TOKENS = [12345678, 'fake_client_id', 'fake_client_secret', 'fake_refresh_token', 'fake_developer_token']
+
+
+@my_vcr.use_cassette('test_get_campaigns')
+def test_for_customer__clones_services():
+    manager = AdwordsAPI(*TOKENS)
+    account = manager.for_customer(999)
+
+    service = account.get_service('CampaignService')
+    template = manager.get_service('CampaignService')
+    assert service is not template
+    assert service.suds_client.wsdl is template.suds_client.wsdl
+    assert account.client.client_customer_id == 999
+    assert manager.client.client_customer_id == 12345678
+    assert account.client.oauth2_client is manager.client.oauth2_client
+
+    campaigns = list(account.get_campaigns())
+    assert len(campaigns) == 4
+    assert service.suds_client.options.soapheaders.clientCustomerId == 999
+    assert not template.suds_client.options.soapheaders
+
+
+class FakeManager(object):
+    def __init__(self):
+        self.made = []
+        self.accounts = []
+
+    def for_customer(self, customer_id):
+        self.made.append(customer_id)
+
+        class Account(object):
+            account_id = customer_id
+            flushed = False
+
+            def flush(self):
+                self.flushed = True
+
+        account = Account()
+        self.accounts.append(account)
+        return account
+
+    def get_accounts(self):
+        return [{'customerId': 1}, {'customerId': 2}]
+
+
+def test_account_pool():
+    manager = FakeManager()
+    pool = AccountPool(manager, max_size=2)
+
+    assert pool.customer_ids() == [1, 2]
+    assert pool.get(1) is pool.get(1)
+    with pool.customer(2) as api:
+        assert api.account_id == 2
+    assert api.flushed
+
+    pool.get(3)
+    pool.get(1)
+    assert manager.made == [1, 2, 3, 1]
+    # evicted clients flush their queued mutations
+    assert [account.flushed for account in manager.accounts] == [True, True, False, False]
+
+    assert pool.map(lambda api: api.account_id * 10, [3, 4, 5], workers=3) == [30, 40, 50]
+
+
+def test_account_pool__customer_error():
+    pool = AccountPool(FakeManager())
+
+    with pytest.raises(ValueError):
+        with pool.customer(1) as api:
+            raise ValueError('bad row')
+    assert api.flushed
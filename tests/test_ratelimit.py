@@ -0,0 +1,40 @@
+import time
+
+from adwordspy.ratelimit import FileTokenBucket
+from adwordspy.ratelimit import TokenBucket
+
+
+def test_token_bucket__burst():
+    bucket = TokenBucket(rate=1, capacity=5)
+
+    assert all(bucket._take(1) == 0 for _ in range(5))
+    assert bucket._take(1) > 0
+
+
+def test_token_bucket__pause():
+    bucket = TokenBucket(rate=1000)
+    bucket.pause(30)
+
+    assert 29 < bucket._take(1) <= 30
+
+
+def test_token_bucket__acquire_waits():
+    bucket = TokenBucket(rate=50, capacity=1)
+    bucket.acquire()
+
+    started = time.time()
+    bucket.acquire()
+    assert time.time() - started >= 0.01
+
+
+def test_file_token_bucket__shared(tmpdir):
+    path = str(tmpdir.join('bucket'))
+    first = FileTokenBucket(path, rate=1, capacity=2)
+    second = FileTokenBucket(path, rate=1, capacity=2)
+
+    assert first._take(1) == 0
+    assert second._take(1) == 0
+    assert first._take(1) > 0
+
+    second.pause(30)
+    assert first._take(1) > 29
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from adwordspy.reader import ReportReader
+
+REPORT = (
+    b'Campaign ID,Ad group ID,Ad\n'
+    b'1,10,first\n'
+    b'1,11,"multi\nline, quoted"\n'
+    b'2,20,third\n'
+    b'1,10,fourth\n'
+)
+
+
+@pytest.fixture
+def report(tmpdir):
+    path = tmpdir.join('report.csv')
+    path.write_binary(REPORT)
+    return str(path)
+
+
+def test_report_reader(report):
+    with ReportReader(report, keys=['Campaign ID']) as reader:
+        assert reader.fields == ['Campaign ID', 'Ad group ID', 'Ad']
+        assert len(reader) == 4
+        assert reader[1] == ['1', '11', 'multi\nline, quoted']
+        assert reader[-1] == ['1', '10', 'fourth']
+        assert list(reader.rows(1, 3)) == [['1', '11', 'multi\nline, quoted'], ['2', '20', 'third']]
+        assert [row[2] for row in reader.lookup('Campaign ID', 1)] == ['first', 'multi\nline, quoted', 'fourth']
+        assert reader.lookup('Campaign ID', 3) == []
+        with pytest.raises(KeyError):
+            reader.lookup('Ad group ID', 10)
+        with pytest.raises(IndexError):
+            reader[4]
+
+
+def test_report_reader__persisted_index(report, monkeypatch):
+    ReportReader(report, keys=['Campaign ID']).close()
+    assert os.path.exists(report + '.idx')
+
+    def fail(*args):
+        raise AssertionError('index rebuilt')
+
+    monkeypatch.setattr(ReportReader, '_build_index', fail)
+    with ReportReader(report, keys=['Campaign ID']) as reader:
+        assert reader[3] == ['1', '10', 'fourth']
+
+    # a new key column needs a new index
+    with pytest.raises(AssertionError):
+        ReportReader(report, keys=['Ad group ID'])
+
+
+def test_report_reader__stale_index(report, tmpdir):
+    ReportReader(report).close()
+    tmpdir.join('report.csv').write_binary(REPORT + b'3,30,fifth\n')
+
+    with ReportReader(report) as reader:
+        assert len(reader) == 5
+        assert reader[4] == ['3', '30', 'fifth']
+
+
+def test_report_reader__fields_without_header(tmpdir):
+    path = tmpdir.join('report.csv')
+    path.write_binary(b'1,10\n2,20')
+
+    with ReportReader(str(path), fields=['CampaignId', 'AdGroupId'], keys=['AdGroupId']) as reader:
+        assert len(reader) == 2
+        assert reader.lookup('AdGroupId', 20) == [['2', '20']]
+
+
+def test_report_reader__empty(tmpdir):
+    path = tmpdir.join('report.csv')
+    path.write_binary(b'')
+
+    with ReportReader(str(path), fields=['CampaignId']) as reader:
+        assert len(reader) == 0
+        assert list(reader.rows()) == []
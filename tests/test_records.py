@@ -0,0 +1,43 @@
+import pickle
+
+import suds.sudsobject
+
+from adwordspy.records import record_class
+from adwordspy.records import to_record
+
+
+def _suds(type_name, **values):
+    entity = suds.sudsobject.Factory.object(type_name)
+    for name, value in sorted(values.items()):
+        setattr(entity, name, value)
+    return entity
+
+
+def _keyword():
+    criterion = _suds('Keyword', id=1000, text='shoes', matchType='EXACT')
+    setattr(criterion, 'Criterion.Type', 'Keyword')
+    return _suds('BiddableAdGroupCriterion', adGroupId=10, criterion=criterion, userStatus='ENABLED', labels=[])
+
+
+def test_to_record():
+    keyword = to_record(_keyword())
+
+    assert not hasattr(keyword, '__dict__')
+    assert keyword.adGroupId == 10
+    assert keyword['criterion']['text'] == 'shoes'
+    assert keyword.criterion.Criterion_Type == 'Keyword'
+    assert keyword.criterion['Criterion.Type'] == 'Keyword'
+    assert 'userStatus' in keyword
+    assert 'status' not in keyword
+    assert dict(keyword)['userStatus'] == 'ENABLED'
+    assert keyword._asdict()['criterion']['matchType'] == 'EXACT'
+
+
+def test_record_class__reused():
+    assert type(to_record(_keyword())) is type(to_record(_keyword()))
+    assert record_class('Campaign', ['id']) is not record_class('Campaign', ['id', 'name'])
+
+
+def test_record__pickle():
+    keyword = to_record(_keyword())
+    assert pickle.loads(pickle.dumps(keyword, 2)) == keyword
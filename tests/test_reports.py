@@ -0,0 +1,79 @@
+import datetime
+import gzip
+import io
+
+import pytest
+
+from adwordspy.reports import concat_reports
+from adwordspy.reports import date_shards
+from adwordspy.reports import iter_csv_rows
+from adwordspy.reports import parse_awql_during
+from adwordspy.reports import parse_awql_fields
+from adwordspy.reports import record_type
+from adwordspy.reports import with_awql_during
+
+REPORT = u'384642878,Campaign #1,12\n326250038,"Campaign, with comma",0\n'
+
+
+def test_parse_awql_fields():
+    query = 'SELECT CampaignId, CampaignName,Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING YESTERDAY'
+    assert parse_awql_fields(query) == ['CampaignId', 'CampaignName', 'Clicks']
+
+    with pytest.raises(ValueError):
+        parse_awql_fields('CAMPAIGN_PERFORMANCE_REPORT')
+
+
+def test_iter_csv_rows():
+    rows = list(iter_csv_rows(io.BytesIO(REPORT.encode('utf-8'))))
+    assert rows == [['384642878', 'Campaign #1', '12'], ['326250038', 'Campaign, with comma', '0']]
+
+
+def test_iter_csv_rows__compressed():
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(REPORT.encode('utf-8'))
+    buf.seek(0)
+
+    rows = list(iter_csv_rows(buf, compressed=True))
+    assert len(rows) == 2
+
+
+def test_record_type():
+    Row = record_type(['CampaignId', 'Clicks'])
+    row = Row('1', '12')
+    assert row.CampaignId == '1'
+    assert row.Clicks == '12'
+
+
+def test_parse_awql_during():
+    query, start, end = parse_awql_during('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING 20170101, 20170131')
+
+    assert query == 'SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT'
+    assert start == datetime.date(2017, 1, 1)
+    assert end == datetime.date(2017, 1, 31)
+    assert with_awql_during(query, start, end) == query + ' DURING 20170101,20170131'
+
+    with pytest.raises(ValueError):
+        parse_awql_during('SELECT Clicks FROM CAMPAIGN_PERFORMANCE_REPORT DURING LAST_30_DAYS')
+
+
+def test_date_shards():
+    shards = date_shards(datetime.date(2017, 1, 1), datetime.date(2017, 1, 15), 7)
+
+    assert shards == [
+        (datetime.date(2017, 1, 1), datetime.date(2017, 1, 7)),
+        (datetime.date(2017, 1, 8), datetime.date(2017, 1, 14)),
+        (datetime.date(2017, 1, 15), datetime.date(2017, 1, 15)),
+    ]
+    assert len(date_shards(datetime.date(2017, 1, 1), datetime.date(2017, 1, 15), 1)) == 15
+
+
+def test_concat_reports(tmpdir):
+    first = tmpdir.join('first.csv')
+    first.write('Day,Clicks\n2017-01-01,1\n')
+    second = tmpdir.join('second.csv')
+    second.write('Day,Clicks\n2017-01-02,2\n')
+
+    output = io.BytesIO()
+    concat_reports([str(first), str(second)], output, column_header=True)
+    assert output.getvalue() == b'Day,Clicks\n2017-01-01,1\n2017-01-02,2\n'
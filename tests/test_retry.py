@@ -0,0 +1,85 @@
+import pytest
+
+import suds
+
+from adwordspy.retry import RetriesLimitException
+from adwordspy.retry import RetryPolicy
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def web_fault(*errors):
+    fault = Obj(faultstring='fault', detail=Obj(ApiExceptionFault=Obj(errors=list(errors))))
+    return suds.WebFault(fault, None)
+
+
+class FlakyCall(object):
+    def __init__(self, *faults):
+        self.faults = list(faults)
+        self.services = []
+
+    def __call__(self, service):
+        self.services.append(service)
+        if self.faults:
+            raise self.faults.pop(0)
+        return 'result'
+
+
+def test_retry_policy__retry():
+    call = FlakyCall(web_fault({'ApiError.Type': 'InternalApiError'}),
+                     web_fault({'ApiError.Type': 'RateExceededError', 'retryAfterSeconds': '30'}))
+    policy = RetryPolicy(retries=2, sleep=False)
+
+    assert policy.call(call, 'service') == 'result'
+    assert call.services == ['service'] * 3
+
+
+def test_retry_policy__limit():
+    call = FlakyCall(*[web_fault({'ApiError.Type': 'RateExceededError', 'retryAfterSeconds': '1'})] * 5)
+    policy = RetryPolicy(retries=2, sleep=False)
+
+    with pytest.raises(RetriesLimitException):
+        policy.call(call, 'service')
+    assert len(call.services) == 3
+
+
+def test_retry_policy__max_elapsed():
+    call = FlakyCall(web_fault({'ApiError.Type': 'RateExceededError', 'retryAfterSeconds': '60'}))
+    policy = RetryPolicy(retries=5, max_elapsed=10, sleep=False)
+
+    with pytest.raises(RetriesLimitException):
+        policy.call(call, 'service')
+
+
+def test_retry_policy__refresh():
+    call = FlakyCall(web_fault({'ApiError.Type': 'AuthenticationError'}))
+    policy = RetryPolicy(sleep=False)
+
+    assert policy.call(call, 'old service', refresh=lambda: 'new service') == 'result'
+    assert call.services == ['old service', 'new service']
+
+
+def test_retry_policy__raise():
+    call = FlakyCall(web_fault({'ApiError.Type': 'InternalApiError'}, {'ApiError.Type': 'EntityNotFound'}))
+    policy = RetryPolicy(sleep=False)
+
+    with pytest.raises(suds.WebFault):
+        policy.call(call, 'service')
+
+
+def test_retry_policy__rules():
+    call = FlakyCall(web_fault({'ApiError.Type': 'ConcurrentModificationError'}))
+    policy = RetryPolicy(sleep=False, rules={'ConcurrentModificationError': 'retry'})
+
+    assert policy.call(call, 'service') == 'result'
+
+
+def test_retry_policy__backoff():
+    policy = RetryPolicy(base=1, cap=10)
+
+    for attempt in range(1, 10):
+        assert 0 <= policy.backoff(attempt) <= 10
+    assert 30 <= policy.backoff(1, [{'retryAfterSeconds': '30'}]) <= 32
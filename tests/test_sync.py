@@ -0,0 +1,151 @@
+import datetime
+
+import pytz
+import suds.sudsobject
+
+from adwordspy.sync import SYNC_DATE_FORMAT
+from adwordspy.sync import IncrementalSync
+
+
+def _suds(type_name, **values):
+    entity = suds.sudsobject.Factory.object(type_name)
+    for name, value in sorted(values.items()):
+        setattr(entity, name, value)
+    return entity
+
+
+def _ids(filters):
+    for f in filters or ():
+        if f['field'] == 'Id':
+            return set(f['values'])
+    return None
+
+
+class FakeAPI(object):
+    account_id = 1234
+
+    def __init__(self):
+        self.campaigns = {1: {'id': 1, 'status': 'ENABLED'}}
+        self.adgroups = {10: {'id': 10, 'campaignId': 1, 'status': 'ENABLED'}}
+        self.ads = {100: {'adGroupId': 10, 'ad': {'id': 100}, 'status': 'ENABLED'}}
+        self.keywords = {1000: {'adGroupId': 10, 'criterion': {'id': 1000}, 'userStatus': 'ENABLED'}}
+        self.changes = {'lastChangeTimestamp': '20170101 120000'}
+        self.calls = []
+
+    def _select(self, name, entities, filters):
+        self.calls.append(name)
+        ids = _ids(filters)
+        return [e for key, e in sorted(entities.items()) if ids is None or key in ids]
+
+    def get_campaigns(self, fields=None, filters=None):
+        return self._select('campaigns', self.campaigns, filters)
+
+    def get_adgroups(self, campaign_ids, fields=None, filters=None):
+        return self._select('adgroups', self.adgroups, filters)
+
+    def get_ads(self, adgroup_ids, types=None, filters=None, fields=None):
+        return self._select('ads', self.ads, filters)
+
+    def get_keywords(self, adgroup_ids, filters=None, fields=None):
+        return self._select('keywords', self.keywords, filters)
+
+    def get_custom_service(self, name, selector):
+        self.calls.append(name)
+        return [{'customerId': self.account_id, 'dateTimeZone': 'Pacific/Kiritimati'}]
+
+    def get_campaigns_changes(self, campaign_ids, start_date, end_date):
+        self.calls.append(('changes', start_date))
+        return self.changes
+
+    def _invalidate_entities(self, name):
+        pass
+
+
+def test_incremental_sync(tmpdir):
+    api = FakeAPI()
+    sync = IncrementalSync(api, location=str(tmpdir), time_zone='Europe/Ljubljana')
+
+    snapshot = sync.sync()
+    assert api.calls == ['campaigns', 'adgroups', 'ads', 'keywords']
+    assert snapshot.keywords[(10, 1000)]['userStatus'] == 'ENABLED'
+
+    # nothing changed, a single request
+    api.calls = []
+    snapshot = sync.sync()
+    assert len(api.calls) == 1
+    assert snapshot.watermark == '20170101 120000'
+
+    api.ads[100]['status'] = 'PAUSED'
+    api.keywords[1001] = {'adGroupId': 10, 'criterion': {'id': 1001}, 'userStatus': 'ENABLED'}
+    api.changes = {
+        'lastChangeTimestamp': '20170102 120000',
+        'changedCampaigns': [{
+            'campaignId': 1,
+            'campaignChangeStatus': 'FIELDS_UNCHANGED',
+            'changedAdGroups': [{
+                'adGroupId': 10,
+                'adGroupChangeStatus': 'FIELDS_UNCHANGED',
+                'changedAds': [100],
+                'changedCriteria': [1001],
+                'removedCriteria': [1000],
+            }],
+        }],
+    }
+    api.calls = []
+    snapshot = sync.sync()
+    assert api.calls == [('changes', '20170101 120000'), 'ads', 'keywords']
+    assert snapshot.ads[(10, 100)]['status'] == 'PAUSED'
+    assert sorted(snapshot.keywords) == [(10, 1001)]
+
+    # the watermark and snapshot survive a restart
+    api.changes = {'lastChangeTimestamp': '20170102 130000'}
+    api.calls = []
+    restored = IncrementalSync(api, location=str(tmpdir), time_zone='Europe/Ljubljana').sync()
+    assert api.calls == [('changes', '20170102 120000')]
+    assert sorted(restored.keywords) == [(10, 1001)]
+
+
+def test_incremental_sync__discover():
+    api = FakeAPI()
+    sync = IncrementalSync(api, time_zone='Europe/Ljubljana')
+    sync.sync()
+
+    api.campaigns[2] = {'id': 2, 'status': 'ENABLED'}
+    api.calls = []
+    snapshot = sync.sync(discover=True)
+    assert api.calls[0][0] == 'changes'
+    assert api.calls[1:] == ['campaigns', 'campaigns', 'adgroups', 'ads', 'keywords']
+    assert sorted(snapshot.campaigns) == [1, 2]
+
+
+def test_incremental_sync__account_time_zone():
+    api = FakeAPI()
+    sync = IncrementalSync(api)
+
+    snapshot = sync.sync()
+    assert api.calls[0] == 'ManagedCustomerService'
+    assert sync.time_zone == 'Pacific/Kiritimati'
+    # the first watermark is the account's local time, not the host's
+    watermark = datetime.datetime.strptime(snapshot.watermark, SYNC_DATE_FORMAT)
+    now = datetime.datetime.now(pytz.timezone('Pacific/Kiritimati')).replace(tzinfo=None)
+    assert abs(now - watermark) < datetime.timedelta(minutes=1)
+
+    api.calls = []
+    sync.sync()
+    assert 'ManagedCustomerService' not in api.calls
+
+
+def test_incremental_sync__suds_entities(tmpdir):
+    api = FakeAPI()
+    api.campaigns = {1: _suds('Campaign', id=1, status='ENABLED')}
+    api.adgroups = {10: _suds('AdGroup', id=10, campaignId=1, status='ENABLED')}
+    api.ads = {100: _suds('AdGroupAd', adGroupId=10, ad=_suds('TextAd', id=100), status='ENABLED')}
+    api.keywords = {1000: _suds('BiddableAdGroupCriterion', adGroupId=10, criterion=_suds('Keyword', id=1000), userStatus='ENABLED')}
+    IncrementalSync(api, location=str(tmpdir), time_zone='Europe/Ljubljana').sync()
+
+    api.calls = []
+    restored = IncrementalSync(api, location=str(tmpdir), time_zone='Europe/Ljubljana').snapshot
+    assert restored.watermark is not None
+    assert restored.campaigns[1]['status'] == 'ENABLED'
+    assert restored.ads[(10, 100)]['ad']['id'] == 100
+    assert restored.keywords[(10, 1000)]['userStatus'] == 'ENABLED'
@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.error import HTTPError
+from six.moves.urllib.request import Request
+from suds.transport import Request as SudsRequest
+from suds.transport import TransportError
+
+from adwordspy.transport import ConnectionPool
+from adwordspy.transport import PooledOpener
+from adwordspy.transport import PooledTransport
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, don't wait for the ack of the headers
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        status = 500 if body == b'fault' else 200
+        self.reply(status, b'<reply>' + body + b'</reply>')
+        if body == b'drop':
+            # closes the connection without telling the client
+            self.close_connection = True
+
+    def do_GET(self):
+        self.reply(200, b'x' * 100000)
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    connections = 0
+
+
+@pytest.fixture
+def server():
+    server = Server(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path='/api'):
+    return 'http://127.0.0.1:{}{}'.format(server.server_address[1], path)
+
+
+def test_pool__reuses_connection(server):
+    pool = ConnectionPool()
+    transport = PooledTransport(pool)
+
+    replies = [transport.send(SudsRequest(url(server), 'page {}'.format(i).encode())).message for i in range(5)]
+
+    assert replies == [b'<reply>page 0</reply>', b'<reply>page 1</reply>', b'<reply>page 2</reply>',
+                       b'<reply>page 3</reply>', b'<reply>page 4</reply>']
+    assert server.connections == 1
+    assert (pool.created, pool.reused) == (1, 4)
+
+
+def test_pool__reconnects_closed_connection(server):
+    pool = ConnectionPool()
+    transport = PooledTransport(pool)
+    transport.send(SudsRequest(url(server), b'drop'))
+
+    assert transport.send(SudsRequest(url(server), b'second')).message == b'<reply>second</reply>'
+    assert server.connections == 2
+
+
+def test_pool__unread_response_closes_connection(server):
+    pool = ConnectionPool()
+    response = pool.urlopen('GET', url(server))
+    response.read(10)
+    response.close()
+
+    assert pool._idle == {}
+    pool.urlopen('GET', url(server)).read()
+    assert server.connections == 2
+
+
+def test_pool__per_host_limit(server):
+    pool = ConnectionPool(per_host=1)
+    first = pool.urlopen('GET', url(server))
+    waiting = []
+
+    def second():
+        waiting.append(pool.urlopen('GET', url(server)).read())
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    thread.join(0.2)
+    assert waiting == []
+
+    first.read()
+    thread.join()
+    assert len(waiting[0]) == 100000
+    assert server.connections == 1
+
+
+def test_pool__maxsize(server):
+    pool = ConnectionPool(maxsize=1)
+    responses = [pool.urlopen('GET', url(server)) for _ in range(3)]
+    for response in responses:
+        response.read()
+
+    assert len(list(pool._idle.values())[0]) == 1
+    assert server.connections == 3
+
+
+def test_transport__fault(server):
+    transport = PooledTransport(ConnectionPool())
+
+    with pytest.raises(TransportError) as e:
+        transport.send(SudsRequest(url(server), b'fault'))
+    assert e.value.httpcode == 500
+    assert e.value.fp.read() == b'<reply>fault</reply>'
+
+
+def test_opener__http_error(server):
+    pool = ConnectionPool()
+    opener = PooledOpener(pool)
+
+    assert opener.open(Request(url(server), b'report')).read() == b'<reply>report</reply>'
+    with pytest.raises(HTTPError) as e:
+        opener.open(Request(url(server), b'fault'))
+    assert e.value.code == 500
+    assert e.value.read() == b'<reply>fault</reply>'
+    assert server.connections == 1
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from adwordspy.adwords import AdwordsAPI
+from adwordspy.writebehind import MutationQueue
+
+
+@pytest.fixture
+def adwords_tokens():
+    return [12345678,
+            'fake_client_id',
+            'fake_client_secret',
+            'fake_refresh_token',
+            'fake_developer_token']
+
+
+class FakeBulkAPI(object):
+    def __init__(self):
+        self.calls = []
+
+    def _mutate_bulk(self, name, operations, partial_failure=False, thread_service=False):
+        self.calls.append((name, operations))
+        return operations
+
+
+def test_mutation_queue__coalesce():
+    api = FakeBulkAPI()
+    queue = MutationQueue(api)
+
+    queue.put('AdGroupService', 1, 'pause 1')
+    queue.put('AdGroupService', 2, 'pause 2')
+    queue.put('AdGroupService', 1, 'enable 1')
+    queue.put('AdGroupCriterionService', (1, 5), 'pause 5')
+
+    assert len(queue) == 3
+    assert queue.coalesced == 1
+    assert queue.flush() == ['pause 2', 'enable 1', 'pause 5']
+    assert api.calls == [('AdGroupService', ['pause 2', 'enable 1']), ('AdGroupCriterionService', ['pause 5'])]
+    assert len(queue) == 0
+    assert queue.flush() == []
+
+
+def test_mutation_queue__max_size():
+    api = FakeBulkAPI()
+    queue = MutationQueue(api, max_size=2)
+
+    queue.put('AdGroupService', 1, 'pause 1')
+    assert not api.calls
+    queue.put('AdGroupService', 2, 'pause 2')
+    assert api.calls == [('AdGroupService', ['pause 1', 'pause 2'])]
+
+
+def test_set_keyword_status__write_behind(adwords_tokens):
+    adwords = AdwordsAPI(*adwords_tokens, write_behind=True)
+    api = FakeBulkAPI()
+    adwords.mutation_queue.api = api
+
+    adwords.set_keyword_status(1, 5, 'PAUSED')
+    adwords.set_keyword_status(1, 5, 'ENABLED')
+    adwords.set_keyword_status(1, 5, 'PAUSED')
+    assert not api.calls
+
+    adwords.flush()
+    name, operations = api.calls[0]
+    assert name == 'AdGroupCriterionService'
+    assert [o['operand']['userStatus'] for o in operations] == ['PAUSED']
+
+
+def test_write_behind__timer_flush_error(adwords_tokens):
+    adwords = AdwordsAPI(*adwords_tokens, write_behind=True, flush_interval=0.01)
+    flushed = threading.Event()
+    results = []
+
+    def on_flush(flush_results):
+        results.extend(flush_results)
+        flushed.set()
+
+    adwords.mutation_queue.on_flush = on_flush
+    threads = []
+
+    def build_service(name, partial_failure=False):
+        threads.append(threading.current_thread())
+        raise IOError('connection reset')
+
+    adwords._build_service = build_service
+    adwords.set_adgroup_status(1, 'PAUSED')
+
+    assert flushed.wait(5)
+    # the timer thread builds its own service, the failed operation is reported
+    assert threading.current_thread() not in threads
+    assert [r.ok for r in results] == [False]
+    assert isinstance(results[0].error, IOError)
+    assert len(adwords.mutation_queue) == 0
+
+
+def test_write_behind__close(adwords_tokens):
+    api = FakeBulkAPI()
+    with AdwordsAPI(*adwords_tokens, write_behind=True, flush_interval=60) as adwords:
+        adwords.mutation_queue.api = api
+        adwords.set_adgroup_status(1, 'PAUSED')
+        assert not api.calls
+
+    assert [name for name, _ in api.calls] == ['AdGroupService']
+    assert adwords.mutation_queue._timer is None